@@ -12,6 +12,7 @@ Run: streamlit run app.py
 """
 
 import os
+import re
 import sys
 import streamlit as st
 import pandas as pd
@@ -19,17 +20,52 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from scipy.stats import gaussian_kde
 import joblib
-from datetime import datetime, timedelta, date
+from datetime import date
+from typing import NamedTuple
 
 # ── Add project root to path ─────────────────────────────────
 sys.path.insert(0, os.path.dirname(__file__))
-from optimizer.departure_optimizer import load_models, find_optimal_departure, predict_travel_time
+from optimizer.departure_optimizer import (
+    load_models, find_optimal_departure, predict_quantiles, hhmm_to_min, BASELINE_DISTANCE_MI,
+)
 from services.live_data import get_driving_info, get_weather_forecast, get_tomorrow_forecast, search_addresses
 
 # ── Constants ─────────────────────────────────────────────────
-BASELINE_DISTANCE_MI = 54   # OSRM-verified ATL→GNV
 BASELINE_DURATION_MIN = 64  # OSRM-verified ATL→GNV base
+WEATHER_ORDER = ["Clear", "Fog", "Rain", "Heavy Rain"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+HOUR_OPTIONS = list(range(6, 22))
+MINUTE_OPTIONS = [0, 15, 30, 45]
+
+# Risk Analysis departure grid: 05:00–20:45 in 15-minute slots
+DEP_LABELS = tuple(f"{h:02d}:{m:02d}" for h in range(5, 21) for m in MINUTE_OPTIONS)
+DEP_FRAC = np.array([h + m / 60.0 for h in range(5, 21) for m in MINUTE_OPTIONS], dtype=np.float32)
+
+WEATHER_COLORS = {
+    "Clear": "#22c55e", "Rain": "#3b82f6",
+    "Heavy Rain": "#ef4444", "Fog": "#f59e0b"
+}
+
+# Only the columns the dashboard reads, in the narrowest dtype that holds them
+DATA_DTYPES = {
+    "weather": pd.CategoricalDtype(WEATHER_ORDER),
+    "day_of_week": pd.CategoricalDtype(WEEKDAYS),
+    "departure_hour": "int8",
+    "crash_on_route": "int8",
+    "travel_time_min": "float32",
+    "departure_hour_frac": "float32",
+}
+
+# P(late) indexed by the late flags packed as (q50 << 3) | (q75 << 2) | (q90 << 1) | q95;
+# the highest quantile still predicting an on-time arrival sets the estimate
+P_LATE_LUT = np.array([
+    0.02, 0.07, 0.15, 0.15,           # on time at q75 (late at none / q95 / q90)
+    0.35, 0.35, 0.35, 0.35,           # late at q75, on time at the median
+    0.70, 0.70, 0.70, 0.70,           # late at the median
+    0.70, 0.70, 0.70, 0.70,
+])
 
 # ══════════════════════════════════════════════════════════════
 # PAGE CONFIG
@@ -42,108 +78,152 @@ st.set_page_config(
 )
 
 # ── Custom CSS ────────────────────────────────────────────────
-st.markdown("""
-<style>
-    /* Main background */
-    .stApp {
-        background: linear-gradient(135deg, #0f0c29 0%, #302b63 50%, #24243e 100%);
-    }
+@st.cache_data(ttl=None)
+def _load_css():
+    """Read the dashboard stylesheet once; reruns reuse the cached string."""
+    path = os.path.join(os.path.dirname(__file__), "assets", "custom.css")
+    with open(path, encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
 
-    /* Card-style metric containers */
-    div[data-testid="stMetric"] {
-        background: rgba(255, 255, 255, 0.05);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        border-radius: 12px;
-        padding: 16px 20px;
-        backdrop-filter: blur(10px);
-    }
-    div[data-testid="stMetric"] label {
-        color: #a3a8b8 !important;
-        font-weight: 500;
-    }
-    div[data-testid="stMetric"] div[data-testid="stMetricValue"] {
-        color: #ffffff !important;
-        font-weight: 700;
-    }
 
-    /* Sidebar */
-    section[data-testid="stSidebar"] {
-        background: linear-gradient(180deg, #1a1a2e 0%, #16213e 100%);
-        border-right: 1px solid rgba(255,255,255,0.05);
-    }
+st.markdown(_load_css(), unsafe_allow_html=True)
 
-    /* Tabs */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        background: rgba(255,255,255,0.05);
-        border-radius: 8px 8px 0 0;
-        color: #a3a8b8;
-        border: 1px solid rgba(255,255,255,0.1);
-    }
-    .stTabs [aria-selected="true"] {
-        background: rgba(99, 102, 241, 0.3) !important;
-        color: #ffffff !important;
-        border-color: #6366f1 !important;
-    }
 
-    /* Headers */
-    h1 {
-        background: linear-gradient(90deg, #6366f1, #a855f7, #ec4899);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        font-weight: 800 !important;
-    }
-    h2, h3 {
-        color: #e0e0e0 !important;
-    }
+# ══════════════════════════════════════════════════════════════
+# DATA LOADING
+# ══════════════════════════════════════════════════════════════
+@st.cache_data
+def load_data():
+    path = os.path.join(os.path.dirname(__file__), "data", "commute_data.parquet")
+    df = pd.read_parquet(path, columns=["date", *DATA_DTYPES]).astype(DATA_DTYPES)
+    return df
 
-    /* Dividers */
-    hr {
-        border-color: rgba(255,255,255,0.1) !important;
-    }
 
-    /* Info / success boxes */
-    .stAlert {
-        border-radius: 10px;
-    }
+@st.cache_data
+def precompute_overview_stats(_df):
+    """Aggregates of the (immutable) training data shown in the Overview tab."""
+    monthly = _df.groupby(_df["date"].dt.to_period("M"))["travel_time_min"].agg(
+        ["mean", "median"]
+    ).reset_index()
+    monthly["date"] = monthly["date"].dt.to_timestamp()
 
-    /* Selectbox, sliders */
-    .stSelectbox label, .stSlider label, .stRadio label {
-        color: #c4c4cc !important;
+    daily_weather = _df.groupby("date")["weather"].first()
+    hist_counts, hist_edges = np.histogram(_df["travel_time_min"].to_numpy(), bins=80)
+
+    return {
+        "mean": _df["travel_time_min"].mean(),
+        "max": _df["travel_time_min"].max(),
+        "median": _df["travel_time_min"].median(),
+        "q95": _df["travel_time_min"].quantile(0.95),
+        "crash_rate": _df["crash_on_route"].mean(),
+        "rainy_frac": daily_weather.isin({"Rain", "Heavy Rain"}).mean(),
+        "weather_counts": daily_weather.value_counts(),
+        "weather_options": _df["weather"].unique().tolist(),
+        "monthly": monthly,
+        "hist_counts": hist_counts,
+        "hist_edges": hist_edges,
     }
 
-    /* Hide Streamlit branding */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-
-    /* Tomorrow's commute special card */
-    .tomorrow-card {
-        background: linear-gradient(135deg, rgba(99,102,241,0.15), rgba(168,85,247,0.15));
-        border: 1px solid rgba(99,102,241,0.3);
-        border-radius: 16px;
-        padding: 24px;
-        margin-bottom: 20px;
-    }
-</style>
-""", unsafe_allow_html=True)
 
+class EdaViews(NamedTuple):
+    n_rows: int
+    box_stats: pd.DataFrame
+    box_outliers: pd.DataFrame
+    violin_stats: pd.DataFrame
+    violin_kde: dict
+    heatmap_pivot: pd.DataFrame
+    percentile_bands: pd.DataFrame
+
+
+def tukey_box_stats(frame, keys):
+    """
+    Per-group box-plot statistics of travel time, as Plotly would draw them.
+
+    Returns (stats, outliers): stats has q1 / median / q3 / lowerfence /
+    upperfence per group; outliers holds the rows beyond the 1.5×IQR fences.
+    """
+    grouped = frame.groupby(keys, observed=True)["travel_time_min"]
+    stats = grouped.quantile([0.25, 0.50, 0.75]).unstack().reindex(columns=[0.25, 0.50, 0.75])
+    stats.columns = ["q1", "median", "q3"]
+    iqr = stats["q3"] - stats["q1"]
+    stats["lo"] = stats["q1"] - 1.5 * iqr
+    stats["hi"] = stats["q3"] + 1.5 * iqr
+
+    bounds = frame[keys].join(stats[["lo", "hi"]], on=keys)
+    inside = frame["travel_time_min"].between(bounds["lo"], bounds["hi"])
+    fences = frame[inside].groupby(keys, observed=True)["travel_time_min"].agg(["min", "max"])
+    stats["lowerfence"] = fences["min"]
+    stats["upperfence"] = fences["max"]
+
+    outliers = frame.loc[~inside, [*keys, "travel_time_min"]]
+    return stats.drop(columns=["lo", "hi"]).reset_index(), outliers
+
+
+@st.cache_data(ttl=600, max_entries=64)
+def compute_eda_views(weather_tuple, days_tuple, hour_lo, hour_hi):
+    """Filter the training data and build every EDA tab view in one pass."""
+    data = load_data()
+
+    # Compare categorical codes rather than strings
+    weather_codes = data["weather"].cat.categories.get_indexer(list(weather_tuple))
+    day_codes = data["day_of_week"].cat.categories.get_indexer(list(days_tuple))
+    hours = data["departure_hour"].to_numpy()
+    mask = (
+        np.isin(data["weather"].cat.codes.to_numpy(), weather_codes) &
+        np.isin(data["day_of_week"].cat.codes.to_numpy(), day_codes) &
+        (hours >= hour_lo) & (hours <= hour_hi)
+    )
+    filtered = data[mask]
 
-# ══════════════════════════════════════════════════════════════
-# DATA LOADING
-# ══════════════════════════════════════════════════════════════
-@st.cache_data
-def load_data():
-    path = os.path.join(os.path.dirname(__file__), "data", "commute_data.csv")
-    df = pd.read_csv(path)
-    df["date"] = pd.to_datetime(df["date"])
-    return df
+    pivot = filtered.groupby(
+        ["day_of_week", "departure_hour"], observed=True
+    )["travel_time_min"].mean().unstack("departure_hour")
+    pivot = pivot.reindex([d for d in WEEKDAYS if d in pivot.index])
+
+    pcts = filtered.groupby("departure_hour_frac")["travel_time_min"].quantile(
+        [0.50, 0.75, 0.90, 0.95]
+    ).unstack().reset_index()
+
+    box_stats, box_outliers = tukey_box_stats(filtered, ["departure_hour", "weather"])
+    violin_stats, _ = tukey_box_stats(filtered, ["weather"])
+
+    # Violin outlines as a KDE on a fixed grid per weather type
+    violin_kde = {}
+    for weather, values in filtered.groupby("weather", observed=True)["travel_time_min"]:
+        values = values.to_numpy(dtype=np.float64)
+        if len(values) < 2 or values.std() == 0:
+            continue
+        grid = np.linspace(values.min(), values.max(), 200)
+        violin_kde[weather] = (grid, gaussian_kde(values)(grid))
+
+    return EdaViews(
+        n_rows=len(filtered),
+        box_stats=box_stats,
+        box_outliers=box_outliers,
+        violin_stats=violin_stats,
+        violin_kde=violin_kde,
+        heatmap_pivot=pivot,
+        percentile_bands=pcts,
+    )
 
 
 @st.cache_resource
 def get_models():
-    return load_models()
+    models, weather_to_idx, feature_cols = load_models()
+    # Warm each model once so the first user query doesn't pay lazy init costs
+    warmup_X = np.zeros((1, len(feature_cols)), dtype=np.float32)
+    for model in models.values():
+        model.predict(warmup_X)
+    return models, weather_to_idx, feature_cols
+
+
+@st.cache_data(ttl=1800)
+def cached_find_optimal(target_str, dow_num, wx_cat, confidence, dist_scale,
+                        return_candidates=False):
+    return find_optimal_departure(
+        models, weather_to_idx, target_str, dow_num, wx_cat, confidence,
+        distance_scale=dist_scale, return_candidates=return_candidates
+    )
 
 
 @st.cache_data(ttl=3600)
@@ -156,13 +236,35 @@ def cached_weather_forecast(lat, lon, days=3):
     return get_weather_forecast(lat, lon, days)
 
 
-@st.cache_data(ttl=600)
-def cached_address_search(query):
+def normalize_query(query):
+    """Collapse case, whitespace and comma spacing so equivalent searches share a cache key."""
+    query = " ".join(query.strip().lower().split())
+    return re.sub(r"\s*,\s*", ", ", query)
+
+
+def suggest_addresses(query):
+    """Address suggestions for a normalized query; too-short queries never hit the network."""
+    if len(query) < 3:
+        return []
     return search_addresses(query, limit=5)
 
 
+@st.cache_data(ttl=600)
+def cached_batch_search(queries):
+    """
+    Address suggestions for several normalized queries, fetched in turn
+    (Nominatim allows one request per second). Duplicate queries share one
+    lookup. Returns one result list per query.
+    """
+    unique = list(dict.fromkeys(queries))
+    results = {q: suggest_addresses(q) for q in unique}
+    return tuple(results[q] for q in queries)
+
+
 df = load_data()
-models, le_weather, feature_cols = get_models()
+models, weather_to_idx, feature_cols = get_models()
+overview_stats = precompute_overview_stats(df)
+WEATHER_OPTIONS = overview_stats["weather_options"]
 
 # ══════════════════════════════════════════════════════════════
 # SIDEBAR — Route Setup
@@ -181,14 +283,7 @@ with st.sidebar:
         placeholder="e.g. 2450 Peachtree Rd NW, Atlanta, GA",
         help="Enter a street address, city, or landmark. Use full addresses for best results (Nominatim doesn't index business names — use the street address instead).",
     )
-    origin_matches = cached_address_search(origin_input)
-    if len(origin_matches) > 1:
-        origin_input = st.selectbox(
-            "Did you mean?", origin_matches, index=0,
-            key="origin_pick", label_visibility="visible"
-        )
-    elif len(origin_matches) == 1:
-        st.caption(f"📍 {origin_matches[0][:80]}…" if len(origin_matches[0]) > 80 else f"📍 {origin_matches[0]}")
+    origin_pick_slot = st.container()
 
     # ── Destination ──
     dest_input = st.text_input(
@@ -197,14 +292,30 @@ with st.sidebar:
         placeholder="e.g. 1112 Airport Pkwy, Gainesville, GA",
         help="Enter a street address, city, or landmark. Use full addresses for best results.",
     )
-    dest_matches = cached_address_search(dest_input)
-    if len(dest_matches) > 1:
-        dest_input = st.selectbox(
-            "Did you mean?", dest_matches, index=0,
-            key="dest_pick", label_visibility="visible"
-        )
-    elif len(dest_matches) == 1:
-        st.caption(f"📍 {dest_matches[0][:80]}…" if len(dest_matches[0]) > 80 else f"📍 {dest_matches[0]}")
+    dest_pick_slot = st.container()
+
+    # Fetch both suggestion lists in one cached call
+    origin_matches, dest_matches = cached_batch_search(
+        (normalize_query(origin_input), normalize_query(dest_input))
+    )
+
+    with origin_pick_slot:
+        if len(origin_matches) > 1:
+            origin_input = st.selectbox(
+                "Did you mean?", origin_matches, index=0,
+                key="origin_pick", label_visibility="visible"
+            )
+        elif len(origin_matches) == 1:
+            st.caption(f"📍 {origin_matches[0][:80]}…" if len(origin_matches[0]) > 80 else f"📍 {origin_matches[0]}")
+
+    with dest_pick_slot:
+        if len(dest_matches) > 1:
+            dest_input = st.selectbox(
+                "Did you mean?", dest_matches, index=0,
+                key="dest_pick", label_visibility="visible"
+            )
+        elif len(dest_matches) == 1:
+            st.caption(f"📍 {dest_matches[0][:80]}…" if len(dest_matches[0]) > 80 else f"📍 {dest_matches[0]}")
 
     # ── OSRM real driving info ──
     route_info = cached_driving_info(origin_input, dest_input)
@@ -230,16 +341,16 @@ with st.sidebar:
     forecasts = cached_weather_forecast(dest_coords[0], dest_coords[1], days=3)
 
     if forecasts:
-        for fc in forecasts:
-            emoji_map = {"Clear": "☀️", "Rain": "🌧️", "Heavy Rain": "⛈️", "Fog": "🌫️"}
-            wx_emoji = emoji_map.get(fc["weather_category"], "🌤️")
-            is_today = fc["date"] == date.today().isoformat()
-            label = "**Today**" if is_today else fc["day_name"]
-            st.markdown(
-                f"{wx_emoji} {label}: {fc['weather_desc']} "
-                f"({fc['precip_probability']}% precip) "
-                f"· {fc['temp_min_f']:.0f}–{fc['temp_max_f']:.0f}°F"
-            )
+        emoji_map = {"Clear": "☀️", "Rain": "🌧️", "Heavy Rain": "⛈️", "Fog": "🌫️"}
+        today = date.today().isoformat()
+        # One markdown block for all days instead of one element per forecast
+        st.markdown("  \n".join(
+            f"{emoji_map.get(fc['weather_category'], '🌤️')} "
+            f"{'**Today**' if fc['date'] == today else fc['day_name']}: {fc['weather_desc']} "
+            f"({fc['precip_probability']}% precip) "
+            f"· {fc['temp_min_f']:.0f}–{fc['temp_max_f']:.0f}°F"
+            for fc in forecasts
+        ))
     else:
         st.info("Weather unavailable")
 
@@ -263,521 +374,505 @@ st.markdown(
     f"**{route_distance} mi**, base drive **{route_base_min:.0f} min***"
 )
 
+# Only the selected tab's body runs; switching tabs triggers a rerun
 tab1, tab2, tab3, tab4 = st.tabs([
     "📋 Overview",
     "📊 EDA Explorer",
     "🎯 Departure Advisor",
     "🔥 Risk Analysis"
-])
+], key="active_tab", on_change="rerun")
 
 # ──────────────────────────────────────────────────────────────
 # TAB 1: OVERVIEW
 # ──────────────────────────────────────────────────────────────
-with tab1:
-    st.header("Route Overview")
+if tab1.open:
+    with tab1:
+        st.header("Route Overview")
 
-    col1, col2, col3, col4 = st.columns(4)
-    col1.metric("🕐 Avg Travel Time", f"{df['travel_time_min'].mean() * dist_scale:.0f} min")
-    col2.metric("📈 Worst Case", f"{df['travel_time_min'].max() * dist_scale:.0f} min")
-    col3.metric("🌧️ Rainy Days", f"{(df.groupby('date')['weather'].first().isin(['Rain','Heavy Rain'])).mean():.0%}")
-    col4.metric("💥 Crash Rate", f"{df['crash_on_route'].mean():.1%}")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("🕐 Avg Travel Time", f"{overview_stats['mean'] * dist_scale:.0f} min")
+        col2.metric("📈 Worst Case", f"{overview_stats['max'] * dist_scale:.0f} min")
+        col3.metric("🌧️ Rainy Days", f"{overview_stats['rainy_frac']:.0%}")
+        col4.metric("💥 Crash Rate", f"{overview_stats['crash_rate']:.1%}")
 
-    st.divider()
+        st.divider()
 
-    # Overall distribution
-    col_left, col_right = st.columns(2)
+        # Overall distribution
+        col_left, col_right = st.columns(2)
+
+        with col_left:
+            st.subheader("Travel Time Distribution")
+            # Binned server-side — the browser only receives 80 bar heights
+            edges = overview_stats["hist_edges"]
+            fig = go.Figure(go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2, y=overview_stats["hist_counts"],
+                width=edges[1] - edges[0], marker_color="#6366f1",
+                hovertemplate="Travel Time (min)=%{x:.1f}<br>count=%{y}<extra></extra>",
+            ))
+            fig.update_layout(xaxis_title="Travel Time (min)", yaxis_title="count")
+            fig.add_vline(x=overview_stats["median"], line_dash="dash",
+                           line_color="yellow",
+                           annotation_text=f"Median: {overview_stats['median']:.0f} min")
+            fig.add_vline(x=overview_stats["q95"], line_dash="dot",
+                           line_color="red",
+                           annotation_text=f"95th: {overview_stats['q95']:.0f} min")
+            fig.update_layout(
+                template="plotly_dark",
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(0,0,0,0)",
+                height=400,
+            )
+            st.plotly_chart(fig, use_container_width=True)
 
-    with col_left:
-        st.subheader("Travel Time Distribution")
-        fig = px.histogram(
-            df, x="travel_time_min", nbins=80,
-            color_discrete_sequence=["#6366f1"],
-            labels={"travel_time_min": "Travel Time (min)"},
-        )
-        fig.add_vline(x=df["travel_time_min"].median(), line_dash="dash",
-                       line_color="yellow",
-                       annotation_text=f"Median: {df['travel_time_min'].median():.0f} min")
-        fig.add_vline(x=df["travel_time_min"].quantile(0.95), line_dash="dot",
-                       line_color="red",
-                       annotation_text=f"95th: {df['travel_time_min'].quantile(0.95):.0f} min")
-        fig.update_layout(
-            template="plotly_dark",
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            height=400,
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        with col_right:
+            st.subheader("Weather Breakdown")
+            weather_counts = overview_stats["weather_counts"]
+            fig = px.pie(
+                values=weather_counts.values,
+                names=weather_counts.index,
+                color_discrete_sequence=px.colors.qualitative.Pastel,
+                hole=0.4,
+            )
+            fig.update_layout(
+                template="plotly_dark",
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(0,0,0,0)",
+                height=400,
+            )
+            st.plotly_chart(fig, use_container_width=True)
 
-    with col_right:
-        st.subheader("Weather Breakdown")
-        weather_counts = df.groupby("date")["weather"].first().value_counts()
-        fig = px.pie(
-            values=weather_counts.values,
-            names=weather_counts.index,
-            color_discrete_sequence=px.colors.qualitative.Pastel,
-            hole=0.4,
-        )
+        # Monthly trend
+        st.subheader("Monthly Travel Time Trend")
+        monthly = overview_stats["monthly"]
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=monthly["date"], y=monthly["mean"],
+                                  mode="lines+markers", name="Mean",
+                                  line=dict(color="#a855f7", width=3)))
+        fig.add_trace(go.Scatter(x=monthly["date"], y=monthly["median"],
+                                  mode="lines+markers", name="Median",
+                                  line=dict(color="#6366f1", width=3)))
         fig.update_layout(
             template="plotly_dark",
             paper_bgcolor="rgba(0,0,0,0)",
             plot_bgcolor="rgba(0,0,0,0)",
-            height=400,
+            height=350,
+            yaxis_title="Travel Time (min)",
         )
         st.plotly_chart(fig, use_container_width=True)
 
-    # Monthly trend
-    st.subheader("Monthly Travel Time Trend")
-    monthly = df.groupby(df["date"].dt.to_period("M"))["travel_time_min"].agg(
-        ["mean", "median"]
-    ).reset_index()
-    monthly["date"] = monthly["date"].dt.to_timestamp()
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=monthly["date"], y=monthly["mean"],
-                              mode="lines+markers", name="Mean",
-                              line=dict(color="#a855f7", width=3)))
-    fig.add_trace(go.Scatter(x=monthly["date"], y=monthly["median"],
-                              mode="lines+markers", name="Median",
-                              line=dict(color="#6366f1", width=3)))
-    fig.update_layout(
-        template="plotly_dark",
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        height=350,
-        yaxis_title="Travel Time (min)",
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
 
 # ──────────────────────────────────────────────────────────────
 # TAB 2: EDA EXPLORER
 # ──────────────────────────────────────────────────────────────
-with tab2:
-    st.header("EDA Explorer")
-
-    # Filters
-    fcol1, fcol2, fcol3 = st.columns(3)
-    with fcol1:
-        sel_weather = st.multiselect(
-            "Weather", df["weather"].unique().tolist(),
-            default=df["weather"].unique().tolist()
-        )
-    with fcol2:
-        sel_days = st.multiselect(
-            "Day of Week",
-            ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
-            default=["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+if tab2.open:
+    with tab2:
+        st.header("EDA Explorer")
+
+        # Filters
+        fcol1, fcol2, fcol3 = st.columns(3)
+        with fcol1:
+            sel_weather = st.multiselect(
+                "Weather", WEATHER_OPTIONS,
+                default=WEATHER_OPTIONS
+            )
+        with fcol2:
+            sel_days = st.multiselect(
+                "Day of Week",
+                WEEKDAYS,
+                default=WEEKDAYS
+            )
+        with fcol3:
+            hour_range = st.slider("Departure Hour Range", 5, 20, (5, 20))
+
+        eda = compute_eda_views(
+            tuple(sorted(sel_weather)), tuple(sorted(sel_days)),
+            hour_range[0], hour_range[1],
         )
-    with fcol3:
-        hour_range = st.slider("Departure Hour Range", 5, 20, (5, 20))
 
-    filtered = df[
-        (df["weather"].isin(sel_weather)) &
-        (df["day_of_week"].isin(sel_days)) &
-        (df["departure_hour"] >= hour_range[0]) &
-        (df["departure_hour"] <= hour_range[1])
-    ]
+        st.markdown(f"*Showing {eda.n_rows:,} of {len(df):,} records*")
+        st.divider()
 
-    st.markdown(f"*Showing {len(filtered):,} of {len(df):,} records*")
-    st.divider()
+        # Chart 1: boxplot by hour
+        col1, col2 = st.columns(2)
 
-    # Chart 1: boxplot by hour
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.subheader("Travel Time by Departure Hour")
-        fig = px.box(
-            filtered, x="departure_hour", y="travel_time_min",
-            color="weather",
-            color_discrete_map={
-                "Clear": "#22c55e", "Rain": "#3b82f6",
-                "Heavy Rain": "#ef4444", "Fog": "#f59e0b"
-            },
-            labels={"departure_hour": "Hour", "travel_time_min": "Travel Time (min)"},
+        with col1:
+            st.subheader("Travel Time by Departure Hour")
+            # Pre-aggregated boxes: only quartiles, fences and outliers go to the browser
+            fig = go.Figure()
+            for weather in WEATHER_ORDER:
+                stats = eda.box_stats[eda.box_stats["weather"] == weather]
+                if stats.empty:
+                    continue
+                outliers = eda.box_outliers[eda.box_outliers["weather"] == weather]
+                fig.add_trace(go.Box(
+                    x=stats["departure_hour"], q1=stats["q1"], median=stats["median"],
+                    q3=stats["q3"], lowerfence=stats["lowerfence"],
+                    upperfence=stats["upperfence"], name=weather, legendgroup=weather,
+                    marker_color=WEATHER_COLORS[weather], boxpoints=False, offsetgroup=weather,
+                ))
+                fig.add_trace(go.Scatter(
+                    x=outliers["departure_hour"], y=outliers["travel_time_min"],
+                    mode="markers", name=weather, legendgroup=weather, showlegend=False,
+                    marker=dict(color=WEATHER_COLORS[weather], size=4),
+                    offsetgroup=weather,
+                ))
+            fig.update_layout(
+                boxmode="group", scattermode="group",
+                xaxis_title="Hour", yaxis_title="Travel Time (min)", legend_title="weather",
+            )
+            fig.update_layout(
+                template="plotly_dark",
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(0,0,0,0)",
+                height=450,
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+        with col2:
+            st.subheader("Weather Impact (Violin Plot)")
+            # Violins drawn from the precomputed KDE outline plus a summary box
+            fig = go.Figure()
+            violin_weathers = [w for w in WEATHER_ORDER if w in eda.violin_kde]
+            for pos, weather in enumerate(violin_weathers):
+                grid, density = eda.violin_kde[weather]
+                half_width = density / density.max() * 0.4
+                fig.add_trace(go.Scatter(
+                    x=np.concatenate([pos - half_width, (pos + half_width)[::-1]]),
+                    y=np.concatenate([grid, grid[::-1]]),
+                    fill="toself", mode="lines", name=weather, legendgroup=weather,
+                    line=dict(color=WEATHER_COLORS[weather], width=1), hoverinfo="skip",
+                ))
+                stats = eda.violin_stats[eda.violin_stats["weather"] == weather]
+                fig.add_trace(go.Box(
+                    x=[pos], q1=stats["q1"], median=stats["median"], q3=stats["q3"],
+                    lowerfence=stats["lowerfence"], upperfence=stats["upperfence"],
+                    name=weather, legendgroup=weather, showlegend=False, width=0.08,
+                    marker_color=WEATHER_COLORS[weather], boxpoints=False,
+                ))
+            fig.update_layout(
+                xaxis=dict(
+                    tickmode="array", tickvals=list(range(len(violin_weathers))),
+                    ticktext=violin_weathers,
+                ),
+                xaxis_title="weather", yaxis_title="travel_time_min", legend_title="weather",
+            )
+            fig.update_layout(
+                template="plotly_dark",
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(0,0,0,0)",
+                height=450,
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+        # Chart 2: Heat map
+        st.subheader("Average Travel Time — Day × Hour Heatmap")
+        fig = px.imshow(
+            eda.heatmap_pivot, color_continuous_scale="YlOrRd",
+            labels={"x": "Departure Hour", "y": "Day", "color": "Avg Minutes"},
+            aspect="auto",
         )
         fig.update_layout(
             template="plotly_dark",
             paper_bgcolor="rgba(0,0,0,0)",
             plot_bgcolor="rgba(0,0,0,0)",
-            height=450,
+            height=350,
         )
         st.plotly_chart(fig, use_container_width=True)
 
-    with col2:
-        st.subheader("Weather Impact (Violin Plot)")
-        fig = px.violin(
-            filtered, x="weather", y="travel_time_min",
-            color="weather",
-            box=True, points=False,
-            color_discrete_map={
-                "Clear": "#22c55e", "Rain": "#3b82f6",
-                "Heavy Rain": "#ef4444", "Fog": "#f59e0b"
-            },
-            category_orders={"weather": ["Clear", "Fog", "Rain", "Heavy Rain"]},
-        )
+        # Chart 3: percentile ribbon
+        st.subheader("Travel-Time Percentile Bands")
+        pcts = eda.percentile_bands
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=pcts["departure_hour_frac"], y=pcts[0.95],
+            fill=None, mode="lines", line_color="rgba(239,68,68,0.3)", name="95th"
+        ))
+        fig.add_trace(go.Scatter(
+            x=pcts["departure_hour_frac"], y=pcts[0.50],
+            fill="tonexty", mode="lines", line_color="rgba(99,102,241,0.8)",
+            fillcolor="rgba(239,68,68,0.15)", name="50th–95th band"
+        ))
+        fig.add_trace(go.Scatter(
+            x=pcts["departure_hour_frac"], y=pcts[0.90],
+            fill=None, mode="lines", line_color="rgba(249,115,22,0.5)", name="90th"
+        ))
+        fig.add_trace(go.Scatter(
+            x=pcts["departure_hour_frac"], y=pcts[0.75],
+            fill=None, mode="lines", line_color="rgba(234,179,8,0.5)", name="75th"
+        ))
         fig.update_layout(
             template="plotly_dark",
             paper_bgcolor="rgba(0,0,0,0)",
             plot_bgcolor="rgba(0,0,0,0)",
-            height=450,
+            xaxis_title="Departure Time (hour)",
+            yaxis_title="Travel Time (min)",
+            height=400,
         )
         st.plotly_chart(fig, use_container_width=True)
 
-    # Chart 2: Heat map
-    st.subheader("Average Travel Time — Day × Hour Heatmap")
-    pivot = filtered.pivot_table(
-        values="travel_time_min", index="day_of_week",
-        columns="departure_hour", aggfunc="mean"
-    )
-    day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-    pivot = pivot.reindex([d for d in day_order if d in pivot.index])
-
-    fig = px.imshow(
-        pivot, color_continuous_scale="YlOrRd",
-        labels={"x": "Departure Hour", "y": "Day", "color": "Avg Minutes"},
-        aspect="auto",
-    )
-    fig.update_layout(
-        template="plotly_dark",
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        height=350,
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
-    # Chart 3: percentile ribbon
-    st.subheader("Travel-Time Percentile Bands")
-    pcts = filtered.groupby("departure_hour_frac")["travel_time_min"].quantile(
-        [0.50, 0.75, 0.90, 0.95]
-    ).unstack().reset_index()
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=pcts["departure_hour_frac"], y=pcts[0.95],
-        fill=None, mode="lines", line_color="rgba(239,68,68,0.3)", name="95th"
-    ))
-    fig.add_trace(go.Scatter(
-        x=pcts["departure_hour_frac"], y=pcts[0.50],
-        fill="tonexty", mode="lines", line_color="rgba(99,102,241,0.8)",
-        fillcolor="rgba(239,68,68,0.15)", name="50th–95th band"
-    ))
-    fig.add_trace(go.Scatter(
-        x=pcts["departure_hour_frac"], y=pcts[0.90],
-        fill=None, mode="lines", line_color="rgba(249,115,22,0.5)", name="90th"
-    ))
-    fig.add_trace(go.Scatter(
-        x=pcts["departure_hour_frac"], y=pcts[0.75],
-        fill=None, mode="lines", line_color="rgba(234,179,8,0.5)", name="75th"
-    ))
-    fig.update_layout(
-        template="plotly_dark",
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        xaxis_title="Departure Time (hour)",
-        yaxis_title="Travel Time (min)",
-        height=400,
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
 
 # ──────────────────────────────────────────────────────────────
 # TAB 3: DEPARTURE ADVISOR (with Tomorrow's Commute)
 # ──────────────────────────────────────────────────────────────
-with tab3:
-    st.header("🎯 Departure Advisor")
-
-    # ┌──────────────────────────────────────────────────────────┐
-    # │  TOMORROW'S COMMUTE — Live Forecast + Auto Recommendation│
-    # └──────────────────────────────────────────────────────────┘
-    tomorrow_fc = None
-    if forecasts and len(forecasts) >= 2:
-        tomorrow_fc = forecasts[1]  # index 0=today, 1=tomorrow
+if tab3.open:
+    with tab3:
+        st.header("🎯 Departure Advisor")
 
-    if tomorrow_fc and tomorrow_fc["day_of_week_num"] < 5:  # weekday
-        st.markdown("### 🗓️ Tomorrow's Commute — Live Prediction")
-
-        emoji_map = {"Clear": "☀️", "Rain": "🌧️", "Heavy Rain": "⛈️", "Fog": "🌫️"}
-        wx_emoji = emoji_map.get(tomorrow_fc["weather_category"], "🌤️")
-        wx_cat = tomorrow_fc["weather_category"]
-        dow_num = tomorrow_fc["day_of_week_num"]
-        day_name = tomorrow_fc["day_name"]
-
-        # Auto-compute recommendations for 8:00 AM and 9:00 AM arrivals
-        rec_8 = find_optimal_departure(
-            models, le_weather, "08:00", dow_num, wx_cat, 0.95,
-            distance_scale=dist_scale
-        )
-        rec_9 = find_optimal_departure(
-            models, le_weather, "09:00", dow_num, wx_cat, 0.95,
-            distance_scale=dist_scale
-        )
+        # ┌──────────────────────────────────────────────────────────┐
+        # │  TOMORROW'S COMMUTE — Live Forecast + Auto Recommendation│
+        # └──────────────────────────────────────────────────────────┘
+        tomorrow_fc = None
+        if forecasts and len(forecasts) >= 2:
+            tomorrow_fc = forecasts[1]  # index 0=today, 1=tomorrow
 
-        # Risk context
-        crash_rate_rush = df[
-            (df["departure_hour_frac"].between(7.0, 8.5)) &
-            (df["weather"] == wx_cat)
-        ]["crash_on_route"].mean()
-
-        st.markdown(f"""
-<div class="tomorrow-card">
-<h3 style="margin-top:0; color: #a855f7 !important;">{wx_emoji} {day_name}, {tomorrow_fc["date"]} — {tomorrow_fc["weather_desc"]}</h3>
-<p style="color: #c4c4cc; font-size: 0.95em;">
-    Precipitation: <strong>{tomorrow_fc["precip_probability"]}%</strong> · 
-    Temperature: <strong>{tomorrow_fc["temp_min_f"]:.0f}–{tomorrow_fc["temp_max_f"]:.0f}°F</strong> ·
-    Route: <strong>{route_label}</strong> ({route_distance} mi) ·
-    Rush-hour crash rate ({wx_cat}): <strong>{crash_rate_rush:.1%}</strong>
-</p>
-</div>
-""", unsafe_allow_html=True)
-
-        tcol1, tcol2 = st.columns(2)
-        with tcol1:
-            if rec_8["recommended_departure"]:
-                st.metric(
-                    "🏢 Arrive by 8:00 AM (95% confidence)",
-                    f"Leave at {rec_8['recommended_departure']}",
-                    f"~{rec_8['predicted_travel_min']:.0f} min travel, {rec_8['buffer_minutes']:.0f} min buffer"
-                )
-            else:
-                st.warning("⚠️ 8:00 AM arrival may not be feasible with 95% confidence")
-
-        with tcol2:
-            if rec_9["recommended_departure"]:
-                st.metric(
-                    "🏢 Arrive by 9:00 AM (95% confidence)",
-                    f"Leave at {rec_9['recommended_departure']}",
-                    f"~{rec_9['predicted_travel_min']:.0f} min travel, {rec_9['buffer_minutes']:.0f} min buffer"
-                )
-            else:
-                st.warning("⚠️ 9:00 AM arrival may not be feasible with 95% confidence")
+        if tomorrow_fc and tomorrow_fc["day_of_week_num"] < 5:  # weekday
+            st.markdown("### 🗓️ Tomorrow's Commute — Live Prediction")
 
-        # Insight
-        if wx_cat in ("Rain", "Heavy Rain"):
-            clear_rec = find_optimal_departure(
-                models, le_weather, "08:00", dow_num, "Clear", 0.95,
-                distance_scale=dist_scale
-            )
-            if clear_rec["recommended_departure"] and rec_8["recommended_departure"]:
-                clear_dep_dt = datetime.strptime(clear_rec["recommended_departure"], "%H:%M")
-                rain_dep_dt = datetime.strptime(rec_8["recommended_departure"], "%H:%M")
-                delta = (clear_dep_dt - rain_dep_dt).total_seconds() / 60
-                if delta > 0:
-                    st.info(
-                        f"🌧️ **Weather impact**: {wx_cat} conditions mean leaving "
-                        f"**{delta:.0f} minutes earlier** than a clear day to arrive by 8:00 AM."
+            emoji_map = {"Clear": "☀️", "Rain": "🌧️", "Heavy Rain": "⛈️", "Fog": "🌫️"}
+            wx_emoji = emoji_map.get(tomorrow_fc["weather_category"], "🌤️")
+            wx_cat = tomorrow_fc["weather_category"]
+            dow_num = tomorrow_fc["day_of_week_num"]
+            day_name = tomorrow_fc["day_name"]
+
+            # Auto-compute recommendations for 8:00 AM and 9:00 AM arrivals
+            rec_8 = cached_find_optimal("08:00", dow_num, wx_cat, 0.95, dist_scale)
+            rec_9 = cached_find_optimal("09:00", dow_num, wx_cat, 0.95, dist_scale)
+
+            # Risk context
+            crash_rate_rush = df[
+                (df["departure_hour_frac"].between(7.0, 8.5)) &
+                (df["weather"] == wx_cat)
+            ]["crash_on_route"].mean()
+
+            st.markdown(f"""
+    <div class="tomorrow-card">
+    <h3 style="margin-top:0; color: #a855f7 !important;">{wx_emoji} {day_name}, {tomorrow_fc["date"]} — {tomorrow_fc["weather_desc"]}</h3>
+    <p style="color: #c4c4cc; font-size: 0.95em;">
+        Precipitation: <strong>{tomorrow_fc["precip_probability"]}%</strong> · 
+        Temperature: <strong>{tomorrow_fc["temp_min_f"]:.0f}–{tomorrow_fc["temp_max_f"]:.0f}°F</strong> ·
+        Route: <strong>{route_label}</strong> ({route_distance} mi) ·
+        Rush-hour crash rate ({wx_cat}): <strong>{crash_rate_rush:.1%}</strong>
+    </p>
+    </div>
+    """, unsafe_allow_html=True)
+
+            tcol1, tcol2 = st.columns(2)
+            with tcol1:
+                if rec_8["recommended_departure"]:
+                    st.metric(
+                        "🏢 Arrive by 8:00 AM (95% confidence)",
+                        f"Leave at {rec_8['recommended_departure']}",
+                        f"~{rec_8['predicted_travel_min']:.0f} min travel, {rec_8['buffer_minutes']:.0f} min buffer"
                     )
+                else:
+                    st.warning("⚠️ 8:00 AM arrival may not be feasible with 95% confidence")
+
+            with tcol2:
+                if rec_9["recommended_departure"]:
+                    st.metric(
+                        "🏢 Arrive by 9:00 AM (95% confidence)",
+                        f"Leave at {rec_9['recommended_departure']}",
+                        f"~{rec_9['predicted_travel_min']:.0f} min travel, {rec_9['buffer_minutes']:.0f} min buffer"
+                    )
+                else:
+                    st.warning("⚠️ 9:00 AM arrival may not be feasible with 95% confidence")
+
+            # Insight
+            if wx_cat in ("Rain", "Heavy Rain"):
+                clear_rec = cached_find_optimal("08:00", dow_num, "Clear", 0.95, dist_scale)
+                if clear_rec["recommended_departure"] and rec_8["recommended_departure"]:
+                    delta = (hhmm_to_min(clear_rec["recommended_departure"]) -
+                             hhmm_to_min(rec_8["recommended_departure"]))
+                    if delta > 0:
+                        st.info(
+                            f"🌧️ **Weather impact**: {wx_cat} conditions mean leaving "
+                            f"**{delta:.0f} minutes earlier** than a clear day to arrive by 8:00 AM."
+                        )
 
-        st.divider()
-
-    # ┌──────────────────────────────────────────────────────────┐
-    # │            CUSTOM DEPARTURE QUERY                        │
-    # └──────────────────────────────────────────────────────────┘
-    st.markdown(
-        "### 🔧 Custom Query\n"
-        "Pick any target arrival, weather, and day to get a personalized recommendation."
-    )
+            st.divider()
 
-    acol1, acol2, acol3, acol4 = st.columns(4)
-
-    with acol1:
-        target_hour = st.selectbox("Target Arrival Hour", list(range(6, 22)), index=2)
-    with acol2:
-        target_min = st.selectbox("Target Arrival Minute", [0, 15, 30, 45], index=0)
-    with acol3:
-        adv_weather = st.selectbox(
-            "Expected Weather",
-            ["Clear", "Rain", "Heavy Rain", "Fog"],
-            index=0
-        )
-    with acol4:
-        adv_dow = st.selectbox(
-            "Day of Week",
-            ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
-            index=2
+        # ┌──────────────────────────────────────────────────────────┐
+        # │            CUSTOM DEPARTURE QUERY                        │
+        # └──────────────────────────────────────────────────────────┘
+        st.markdown(
+            "### 🔧 Custom Query\n"
+            "Pick any target arrival, weather, and day to get a personalized recommendation."
         )
 
-    confidence = st.slider(
-        "Confidence Level",
-        min_value=0.50, max_value=0.95, value=0.95, step=0.05,
-        help="Higher = more conservative. 95% means you'll be on time 95% of the time."
-    )
-
-    target_str = f"{target_hour:02d}:{target_min:02d}"
-    dow_num = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"].index(adv_dow)
+        acol1, acol2, acol3, acol4 = st.columns(4)
+
+        with acol1:
+            target_hour = st.selectbox("Target Arrival Hour", HOUR_OPTIONS, index=2)
+        with acol2:
+            target_min = st.selectbox("Target Arrival Minute", MINUTE_OPTIONS, index=0)
+        with acol3:
+            adv_weather = st.selectbox(
+                "Expected Weather",
+                ["Clear", "Rain", "Heavy Rain", "Fog"],
+                index=0
+            )
+        with acol4:
+            adv_dow = st.selectbox(
+                "Day of Week",
+                WEEKDAYS,
+                index=2
+            )
 
-    if st.button("🔍 Find Optimal Departure", type="primary", use_container_width=True):
-        result = find_optimal_departure(
-            models, le_weather, target_str, dow_num, adv_weather, confidence,
-            distance_scale=dist_scale
+        confidence = st.slider(
+            "Confidence Level",
+            min_value=0.50, max_value=0.95, value=0.95, step=0.05,
+            help="Higher = more conservative. 95% means you'll be on time 95% of the time."
         )
 
-        if result["recommended_departure"]:
-            st.divider()
+        target_str = f"{target_hour:02d}:{target_min:02d}"
+        dow_num = WEEKDAYS.index(adv_dow)
 
-            rcol1, rcol2, rcol3, rcol4 = st.columns(4)
-            rcol1.metric("🚗 Depart At", result["recommended_departure"])
-            rcol2.metric("⏱️ Est. Travel", f"{result['predicted_travel_min']:.0f} min")
-            rcol3.metric("🏁 Est. Arrival", result["predicted_arrival"])
-            rcol4.metric("⏳ Buffer", f"{result['buffer_minutes']:.0f} min")
-
-            st.success(
-                f"**Leave at {result['recommended_departure']}** to arrive by "
-                f"**{target_str}** with **{confidence:.0%} confidence** "
-                f"on a **{adv_dow}** with **{adv_weather}** weather. "
-                f"Route: **{route_label}** ({route_distance} mi)"
+        if st.button("🔍 Find Optimal Departure", type="primary", use_container_width=True):
+            result = cached_find_optimal(
+                target_str, dow_num, adv_weather, confidence, dist_scale, return_candidates=True
             )
 
-            # Visualization: all candidates
-            st.subheader("All Departure Options")
-            cand_df = pd.DataFrame(result["all_candidates"])
+            if result["recommended_departure"]:
+                st.divider()
 
-            fig = go.Figure()
-            fig.add_trace(go.Bar(
-                x=cand_df["departure"],
-                y=cand_df["predicted_travel"],
-                marker_color=[
-                    "#22c55e" if ot else "#ef4444" for ot in cand_df["on_time"]
-                ],
-                text=cand_df["predicted_arrival"],
-                textposition="outside",
-                hovertemplate="Depart: %{x}<br>Travel: %{y:.0f} min<br>Arrive: %{text}<extra></extra>",
-            ))
+                rcol1, rcol2, rcol3, rcol4 = st.columns(4)
+                rcol1.metric("🚗 Depart At", result["recommended_departure"])
+                rcol2.metric("⏱️ Est. Travel", f"{result['predicted_travel_min']:.0f} min")
+                rcol3.metric("🏁 Est. Arrival", result["predicted_arrival"])
+                rcol4.metric("⏳ Buffer", f"{result['buffer_minutes']:.0f} min")
 
-            # Target line
-            fig.add_hline(
-                y=(datetime.strptime(target_str, "%H:%M") -
-                   datetime.strptime("05:00", "%H:%M")).total_seconds() / 60,
-                line_dash="dash", line_color="yellow",
-                annotation_text=f"Target: {target_str}",
-                annotation_position="top left",
-            )
+                st.success(
+                    f"**Leave at {result['recommended_departure']}** to arrive by "
+                    f"**{target_str}** with **{confidence:.0%} confidence** "
+                    f"on a **{adv_dow}** with **{adv_weather}** weather. "
+                    f"Route: **{route_label}** ({route_distance} mi)"
+                )
 
-            fig.update_layout(
-                template="plotly_dark",
-                paper_bgcolor="rgba(0,0,0,0)",
-                plot_bgcolor="rgba(0,0,0,0)",
-                xaxis_title="Departure Time",
-                yaxis_title=f"Predicted Travel Time ({confidence:.0%} quantile, min)",
-                height=450,
-                xaxis=dict(dtick=6),  # show every 6th label (~30 min)
-            )
-            st.plotly_chart(fig, use_container_width=True)
+                # Visualization: all candidates
+                st.subheader("All Departure Options")
+                cand_df = pd.DataFrame(result["all_candidates"])
+
+                fig = go.Figure()
+                fig.add_trace(go.Bar(
+                    x=cand_df["departure"],
+                    y=cand_df["predicted_travel"],
+                    marker_color=[
+                        "#22c55e" if ot else "#ef4444" for ot in cand_df["on_time"]
+                    ],
+                    text=cand_df["predicted_arrival"],
+                    textposition="outside",
+                    hovertemplate="Depart: %{x}<br>Travel: %{y:.0f} min<br>Arrive: %{text}<extra></extra>",
+                ))
+
+                # Target line
+                fig.add_hline(
+                    y=hhmm_to_min(target_str) - 5 * 60,
+                    line_dash="dash", line_color="yellow",
+                    annotation_text=f"Target: {target_str}",
+                    annotation_position="top left",
+                )
 
-            st.caption("🟢 Green = on time | 🔴 Red = late at this confidence level")
-        else:
-            st.error("⚠️ No departure time in the 5:00–10:00 window can guarantee arrival on time at this confidence level.")
+                fig.update_layout(
+                    template="plotly_dark",
+                    paper_bgcolor="rgba(0,0,0,0)",
+                    plot_bgcolor="rgba(0,0,0,0)",
+                    xaxis_title="Departure Time",
+                    yaxis_title=f"Predicted Travel Time ({confidence:.0%} quantile, min)",
+                    height=450,
+                    xaxis=dict(dtick=6),  # show every 6th label (~30 min)
+                )
+                st.plotly_chart(fig, use_container_width=True)
+
+                st.caption("🟢 Green = on time | 🔴 Red = late at this confidence level")
+            else:
+                st.error("⚠️ No departure time in the 5:00–10:00 window can guarantee arrival on time at this confidence level.")
 
 
 # ──────────────────────────────────────────────────────────────
 # TAB 4: RISK ANALYSIS
 # ──────────────────────────────────────────────────────────────
-with tab4:
-    st.header("🔥 Risk Analysis")
-    st.markdown("Probability of being **late** for each departure slot, across conditions.")
-
-    st.divider()
-
-    rcol1, rcol2 = st.columns(2)
-    with rcol1:
-        risk_target_h = st.selectbox("Target Arrival Hour ", list(range(6, 22)), index=2, key="risk_h")
-    with rcol2:
-        risk_target_m = st.selectbox("Target Arrival Minute ", [0, 15, 30, 45], index=0, key="risk_m")
-
-    risk_target = f"{risk_target_h:02d}:{risk_target_m:02d}"
-    risk_target_dt = datetime.strptime(risk_target, "%H:%M")
-
-    # Build risk matrix
-    weather_types = ["Clear", "Fog", "Rain", "Heavy Rain"]
-    dep_times = [f"{h:02d}:{m:02d}" for h in range(5, 21) for m in range(0, 60, 15)]
-
-    risk_data = []
-    for weather in weather_types:
-        for dep_str in dep_times:
-            dep_dt = datetime.strptime(dep_str, "%H:%M")
-            dep_frac = dep_dt.hour + dep_dt.minute / 60.0
-
-            # predict at 50th, 75th, 90th, 95th
-            late_probs = {}
-            for q in [0.50, 0.75, 0.90, 0.95]:
-                pred = predict_travel_time(models, le_weather, dep_frac, 2, weather, q) * dist_scale
-                arr = dep_dt + timedelta(minutes=float(pred))
-                late_probs[q] = arr > risk_target_dt
-
-            # Estimate P(late) — rough interpolation
-            if not late_probs[0.50]:
-                if not late_probs[0.75]:
-                    if not late_probs[0.90]:
-                        if not late_probs[0.95]:
-                            p_late = 0.02
-                        else:
-                            p_late = 0.07
-                    else:
-                        p_late = 0.15
-                else:
-                    p_late = 0.35
-            else:
-                p_late = 0.70
-
-            risk_data.append({
-                "departure": dep_str,
-                "weather": weather,
-                "p_late": p_late,
-            })
+if tab4.open:
+    with tab4:
+        st.header("🔥 Risk Analysis")
+        st.markdown("Probability of being **late** for each departure slot, across conditions.")
 
-    risk_df = pd.DataFrame(risk_data)
+        st.divider()
 
-    # Heatmap
-    st.subheader(f"Late Probability Heatmap — Target: {risk_target}")
+        rcol1, rcol2 = st.columns(2)
+        with rcol1:
+            risk_target_h = st.selectbox("Target Arrival Hour ", HOUR_OPTIONS, index=2, key="risk_h")
+        with rcol2:
+            risk_target_m = st.selectbox("Target Arrival Minute ", MINUTE_OPTIONS, index=0, key="risk_m")
+
+        risk_target = f"{risk_target_h:02d}:{risk_target_m:02d}"
+        risk_target_min = risk_target_h * 60 + risk_target_m
+
+        # Build risk matrix
+        weather_types = WEATHER_ORDER
+
+        # One row per (weather, departure) pair — the grid is encoded once and
+        # predicted at the 50th, 75th, 90th and 95th percentiles
+        n_dep = len(DEP_LABELS)
+        dep_grid = np.tile(DEP_FRAC, len(weather_types))
+        weather_grid = np.repeat(weather_types, n_dep)
+        dep_minutes = dep_grid * 60
+
+        preds = predict_quantiles(models, weather_to_idx, dep_grid, 2, weather_grid) * dist_scale
+        late = (dep_minutes + preds > risk_target_min).astype(np.intp)
+
+        # Estimate P(late) — rough interpolation
+        late_idx = (late[0] << 3) | (late[1] << 2) | (late[2] << 1) | late[3]
+        # Rows follow weather_types, columns follow DEP_LABELS
+        p_late = P_LATE_LUT[late_idx].reshape(len(weather_types), n_dep)
+
+        # Heatmap
+        st.subheader(f"Late Probability Heatmap — Target: {risk_target}")
+
+        fig = px.imshow(
+            p_late, x=list(DEP_LABELS), y=weather_types,
+            color_continuous_scale=["#22c55e", "#eab308", "#ef4444", "#7f1d1d"],
+            labels={"x": "Departure Time", "y": "Weather", "color": "P(Late)"},
+            aspect="auto",
+            zmin=0, zmax=0.8,
+        )
+        fig.update_layout(
+            template="plotly_dark",
+            paper_bgcolor="rgba(0,0,0,0)",
+            plot_bgcolor="rgba(0,0,0,0)",
+            height=350,
+            xaxis=dict(dtick=2),
+        )
+        st.plotly_chart(fig, use_container_width=True)
 
-    risk_pivot = risk_df.pivot_table(
-        values="p_late", index="weather", columns="departure"
-    )
-    risk_pivot = risk_pivot.reindex(weather_types)
-
-    fig = px.imshow(
-        risk_pivot,
-        color_continuous_scale=["#22c55e", "#eab308", "#ef4444", "#7f1d1d"],
-        labels={"x": "Departure Time", "y": "Weather", "color": "P(Late)"},
-        aspect="auto",
-        zmin=0, zmax=0.8,
-    )
-    fig.update_layout(
-        template="plotly_dark",
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        height=350,
-        xaxis=dict(dtick=2),
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
-    # Risk by departure time (line chart)
-    st.subheader("Late Probability by Departure Time")
-    fig = go.Figure()
-    color_map = {"Clear": "#22c55e", "Fog": "#f59e0b", "Rain": "#3b82f6", "Heavy Rain": "#ef4444"}
-    for weather in weather_types:
-        subset = risk_df[risk_df["weather"] == weather]
-        fig.add_trace(go.Scatter(
-            x=subset["departure"], y=subset["p_late"],
-            mode="lines+markers", name=weather,
-            line=dict(color=color_map[weather], width=3),
-            marker=dict(size=5),
-        ))
-    fig.add_hline(y=0.05, line_dash="dot", line_color="white",
-                   annotation_text="5% risk threshold")
-    fig.update_layout(
-        template="plotly_dark",
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        yaxis_title="P(Late)",
-        xaxis_title="Departure Time",
-        height=400,
-        xaxis=dict(dtick=4),
-        yaxis=dict(tickformat=".0%"),
-    )
-    st.plotly_chart(fig, use_container_width=True)
+        # Risk by departure time (line chart)
+        st.subheader("Late Probability by Departure Time")
+        fig = go.Figure()
+        color_map = {"Clear": "#22c55e", "Fog": "#f59e0b", "Rain": "#3b82f6", "Heavy Rain": "#ef4444"}
+        for weather, row in zip(weather_types, p_late):
+            fig.add_trace(go.Scatter(
+                x=DEP_LABELS, y=row,
+                mode="lines+markers", name=weather,
+                line=dict(color=color_map[weather], width=3),
+                marker=dict(size=5),
+            ))
+        fig.add_hline(y=0.05, line_dash="dot", line_color="white",
+                       annotation_text="5% risk threshold")
+        fig.update_layout(
+            template="plotly_dark",
+            paper_bgcolor="rgba(0,0,0,0)",
+            plot_bgcolor="rgba(0,0,0,0)",
+            yaxis_title="P(Late)",
+            xaxis_title="Departure Time",
+            height=400,
+            xaxis=dict(dtick=4),
+            yaxis=dict(tickformat=".0%"),
+        )
+        st.plotly_chart(fig, use_container_width=True)
 
-    st.info(
-        "💡 **Interpretation**: The green zone means you're almost certainly on time. "
-        "Red means you should leave earlier or expect to be late. "
-        "Use the **Departure Advisor** tab to get a specific recommendation."
-    )
+        st.info(
+            "💡 **Interpretation**: The green zone means you're almost certainly on time. "
+            "Red means you should leave earlier or expect to be late. "
+            "Use the **Departure Advisor** tab to get a specific recommendation."
+        )
@@ -11,10 +11,10 @@ OSRM-verified base: 53.5 mi / 63.7 min
 
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-import os
+from datetime import datetime
+from pathlib import Path
 
-np.random.seed(42)
+rng = np.random.default_rng(42)  # PCG64; one generator for the whole module
 
 # ──────────────────────────────────────────────────────────────
 # CONFIGURATION
@@ -23,6 +23,8 @@ START_DATE = datetime(2023, 1, 2)   # First Monday of 2023
 END_DATE   = datetime(2024, 12, 31)
 DEPARTURE_SLOTS = pd.date_range("05:00", "20:00", freq="5min").time  # 5 AM – 8 PM
 BASE_DISTANCE_MI = 54
+BLOCK_DAYS = 128  # days simulated at once; bounds the (days, slots) scratch memory
+DATA_DIR = Path(__file__).resolve().parent
 
 # Weather probabilities by season (winter has more rain/fog in North GA)
 WEATHER_PROBS = {
@@ -32,22 +34,18 @@ WEATHER_PROBS = {
     "summer":  {"Clear": 0.45, "Rain": 0.30, "Heavy Rain": 0.20, "Fog": 0.05},
     "fall":    {"Clear": 0.60, "Rain": 0.20, "Heavy Rain": 0.10, "Fog": 0.10},
 }
+SEASONS       = list(WEATHER_PROBS)
+WEATHER_TYPES = list(WEATHER_PROBS["winter"])
+# PROB_MATRIX[season_idx, weather_idx]
+PROB_MATRIX   = np.array([[WEATHER_PROBS[s][w] for w in WEATHER_TYPES] for s in SEASONS])
+
+# Extra crash probability on top of the time-of-day baseline
+CRASH_WEATHER_BOOST = {"Clear": 0.0, "Rain": 0.04, "Heavy Rain": 0.10, "Fog": 0.06}
 
 # ──────────────────────────────────────────────────────────────
 # HELPER FUNCTIONS
 # ──────────────────────────────────────────────────────────────
 
-def get_season(month: int) -> str:
-    if month in (12, 1, 2):
-        return "winter"
-    elif month in (3, 4, 5):
-        return "spring"
-    elif month in (6, 7, 8):
-        return "summer"
-    else:
-        return "fall"
-
-
 def rush_hour_multiplier(departure_hour_frac: float) -> float:
     """
     Returns a congestion multiplier based on departure time.
@@ -91,10 +89,10 @@ def weather_penalty_minutes(weather: str) -> float:
     return penalties.get(weather, 0.0)
 
 
-def crash_probability(weather: str, departure_hour_frac: float) -> float:
+def crash_base_probability(departure_hour_frac: float) -> float:
     """
-    Probability of encountering a crash on the route.
-    Higher during rush hours (AM and PM) and bad weather.
+    Time-of-day part of the crash probability (no weather), higher
+    during rush hours (AM and PM).
     """
     base_prob = 0.04  # 4% baseline
 
@@ -104,16 +102,16 @@ def crash_probability(weather: str, departure_hour_frac: float) -> float:
     # Evening rush-hour boost
     pm_rush_boost = 0.06 * np.exp(-0.5 * ((departure_hour_frac - 17.25) / 0.7) ** 2)
 
-    # Weather boost
-    weather_boost = {"Clear": 0.0, "Rain": 0.04, "Heavy Rain": 0.10, "Fog": 0.06}
-
-    return min(base_prob + am_rush_boost + pm_rush_boost + weather_boost.get(weather, 0.0), 0.35)
+    return base_prob + am_rush_boost + pm_rush_boost
 
 
-def crash_delay_minutes() -> float:
-    """If a crash occurs, sample the delay from a log-normal distribution."""
-    # Median ~12 min, can be much longer (right-skewed)
-    return np.random.lognormal(mean=2.5, sigma=0.6)
+def crash_probability(weather: str, departure_hour_frac: float) -> float:
+    """
+    Probability of encountering a crash on the route.
+    Higher during rush hours (AM and PM) and bad weather.
+    """
+    boost = CRASH_WEATHER_BOOST.get(weather, 0.0)
+    return np.minimum(crash_base_probability(departure_hour_frac) + boost, 0.35)
 
 
 def day_of_week_factor(dow: int) -> float:
@@ -125,79 +123,148 @@ def day_of_week_factor(dow: int) -> float:
     return factors.get(dow, 1.0)
 
 
+def _column(values, grid: tuple, dtype) -> np.ndarray:
+    """
+    Broadcast per-day (D, 1), per-slot (S,) or full (D, S) values into a
+    preallocated flat column (day-major, slot-minor) of the given dtype.
+    """
+    out = np.empty(grid[0] * grid[1], dtype=dtype)
+    out.reshape(grid)[:] = values
+    return out
+
+
+# ──────────────────────────────────────────────────────────────
+# LOOKUP TABLES (evaluated once for the fixed departure-slot grid)
+# ──────────────────────────────────────────────────────────────
+SLOT_FRAC        = np.array([t.hour + t.minute / 60.0 for t in DEPARTURE_SLOTS])
+RUSH_MULT_TABLE  = rush_hour_multiplier(SLOT_FRAC)
+
+# Output columns that depend only on the slot, already rounded/formatted
+SLOT_LABELS      = [t.strftime("%H:%M") for t in DEPARTURE_SLOTS]
+SLOT_HOUR        = np.array([t.hour for t in DEPARTURE_SLOTS], dtype=np.int8)
+SLOT_MINUTE      = np.array([t.minute for t in DEPARTURE_SLOTS], dtype=np.int8)
+SLOT_DEP_HOUR_FRAC = np.round(SLOT_FRAC, 4)
+SLOT_RUSH_MULT   = np.round(RUSH_MULT_TABLE, 4)
+SLOT_MINUTE_OF_DAY = SLOT_HOUR.astype(np.int32) * 60 + SLOT_MINUTE
+
+# "HH:MM" for every minute of the day, indexed by minutes after midnight
+CLOCK_LABELS     = [f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)]
+
+# Indexed by weather code (position in WEATHER_TYPES)
+PENALTY_TABLE    = np.array([weather_penalty_minutes(w) for w in WEATHER_TYPES])
+# CRASH_PROB_TABLE[weather_idx, slot_idx]
+CRASH_PROB_TABLE = np.array([crash_probability(w, SLOT_FRAC) for w in WEATHER_TYPES])
+
+# Indexed by day of week (Mon=0 … Fri=4)
+DOW_FACTOR_TABLE = np.array([day_of_week_factor(d) for d in range(5)])
+
 # ──────────────────────────────────────────────────────────────
 # MAIN GENERATOR
 # ──────────────────────────────────────────────────────────────
 
-def generate_commute_data() -> pd.DataFrame:
-    records = []
+def _simulate_days(weather_code: np.ndarray, dow_factor: np.ndarray):
+    """
+    Simulate every departure slot for a block of days.
+
+    Takes per-day weather codes and day-of-week factors, shape (D,), and
+    returns (base_minutes, weather_penalty, had_crash, crash_delay,
+    travel_time), each of shape (D, S).
+    """
+    shape = (len(weather_code), len(DEPARTURE_SLOTS))
 
+    # --- Base travel time ---
+    base_minutes = rng.normal(loc=54, scale=3, size=shape)  # OSRM-calibrated
+
+    # --- Weather penalty (noise scale is 0 on clear days) ---
+    wx_penalty = PENALTY_TABLE[weather_code][:, None]
+    wx_noise   = rng.normal(0, 1, size=shape) * (wx_penalty * 0.3)
+
+    # --- Crash ---
+    crash_prob  = CRASH_PROB_TABLE[weather_code]
+    had_crash   = rng.random(shape) < crash_prob
+    # Median ~12 min, can be much longer (right-skewed)
+    crash_delay = rng.lognormal(mean=2.5, sigma=0.6, size=shape) * had_crash
+
+    # --- Compute actual travel time, clipped to realistic bounds ---
+    travel_time = (base_minutes * RUSH_MULT_TABLE[None, :] * dow_factor[:, None]
+                   + wx_penalty + wx_noise + crash_delay)
+    travel_time = np.clip(travel_time, 40, 210)
+
+    return base_minutes, wx_penalty + wx_noise, had_crash, crash_delay, travel_time
+
+
+def generate_commute_data() -> pd.DataFrame:
     # Generate all weekdays in the date range
     all_dates = pd.bdate_range(START_DATE, END_DATE)  # business days only
-
-    for date in all_dates:
-        month = date.month
-        season = get_season(month)
-        dow = date.dayofweek  # Mon=0, Fri=4
-
-        # Sample weather for the day (same weather all morning for simplicity)
-        weather_types = list(WEATHER_PROBS[season].keys())
-        weather_probs = list(WEATHER_PROBS[season].values())
-        day_weather = np.random.choice(weather_types, p=weather_probs)
-
-        for dep_time in DEPARTURE_SLOTS:
-            dep_hour_frac = dep_time.hour + dep_time.minute / 60.0
-
-            # --- Base travel time ---
-            base_minutes = np.random.normal(loc=54, scale=3)  # ~50-58 min center (OSRM-calibrated)
-
-            # --- Rush hour multiplier ---
-            rush_mult = rush_hour_multiplier(dep_hour_frac)
-
-            # --- Day-of-week factor ---
-            dow_factor = day_of_week_factor(dow)
-
-            # --- Weather penalty ---
-            wx_penalty = weather_penalty_minutes(day_weather)
-            wx_noise   = np.random.normal(0, wx_penalty * 0.3) if wx_penalty > 0 else 0
-
-            # --- Crash ---
-            crash_prob = crash_probability(day_weather, dep_hour_frac)
-            had_crash  = np.random.random() < crash_prob
-            crash_delay = crash_delay_minutes() if had_crash else 0.0
-
-            # --- Compute actual travel time ---
-            travel_time = (base_minutes * rush_mult * dow_factor
-                           + wx_penalty + wx_noise + crash_delay)
-
-            # Clip to realistic bounds
-            travel_time = np.clip(travel_time, 40, 210)
-
-            # --- Derived fields ---
-            dep_datetime = datetime.combine(date.date(), dep_time)
-            arr_datetime = dep_datetime + timedelta(minutes=float(travel_time))
-
-            records.append({
-                "date":              date.date(),
-                "day_of_week":       date.day_name(),
-                "day_of_week_num":   dow,
-                "season":            season,
-                "departure_time":    dep_time.strftime("%H:%M"),
-                "departure_hour":    dep_time.hour,
-                "departure_minute":  dep_time.minute,
-                "departure_hour_frac": round(dep_hour_frac, 4),
-                "weather":           day_weather,
-                "crash_on_route":    int(had_crash),
-                "rush_hour_multiplier": round(rush_mult, 4),
-                "base_travel_min":   round(base_minutes, 2),
-                "weather_penalty_min": round(wx_penalty + wx_noise, 2),
-                "crash_delay_min":   round(crash_delay, 2),
-                "travel_time_min":   round(travel_time, 2),
-                "arrival_time":      arr_datetime.strftime("%H:%M"),
-                "distance_miles":    BASE_DISTANCE_MI,
-            })
-
-    df = pd.DataFrame(records)
+    n_days, n_slots = len(all_dates), len(DEPARTURE_SLOTS)
+
+    # Per-day quantities, shape (D,)
+    dow     = all_dates.dayofweek.values  # Mon=0, Fri=4
+    season_code = ((all_dates.month.values % 12) // 3).astype(np.int8)  # 0=winter … 3=fall
+    dow_factor = DOW_FACTOR_TABLE[dow]
+
+    # Sample weather for each day (same weather all day for simplicity)
+    # by inverting the per-season CDF with one uniform draw per day
+    cdf = np.cumsum(PROB_MATRIX[season_code], axis=1)
+    cdf[:, -1] = 1.0  # guard against float round-off in the last bin
+    u = rng.random(n_days)
+    weather_code = np.argmax(u[:, None] < cdf, axis=1).astype(np.int8)
+
+    # Per-row outputs, filled one block of days at a time so the scratch
+    # arrays stay the same size however long the date range is
+    n_rows = n_days * n_slots
+    base_col    = np.empty(n_rows, dtype=np.float64)
+    penalty_col = np.empty(n_rows, dtype=np.float64)
+    delay_col   = np.empty(n_rows, dtype=np.float64)
+    travel_col  = np.empty(n_rows, dtype=np.float64)
+    crash_col   = np.empty(n_rows, dtype=np.int8)
+    arrival_col = np.empty(n_rows, dtype=np.int16)
+
+    for d0 in range(0, n_days, BLOCK_DAYS):
+        d1 = min(d0 + BLOCK_DAYS, n_days)
+        rows = slice(d0 * n_slots, d1 * n_slots)
+        base, penalty, had_crash, delay, travel = _simulate_days(
+            weather_code[d0:d1], dow_factor[d0:d1]
+        )
+        # Minute columns are rounded in bulk; kept float64 so sums of them
+        # (e.g. total_delay_min in the BI export) round the same as before
+        base_col[rows]    = np.round(base, 2, out=base).ravel()
+        penalty_col[rows] = np.round(penalty, 2, out=penalty).ravel()
+        delay_col[rows]   = np.round(delay, 2, out=delay).ravel()
+        crash_col[rows]   = had_crash.ravel()
+        # Arrival clock time (whole minutes, wrapping past midnight)
+        arrival_col[rows] = ((SLOT_MINUTE_OF_DAY + np.floor(travel).astype(np.int32))
+                             % (24 * 60)).ravel()
+        travel_col[rows]  = np.round(travel, 2, out=travel).ravel()
+
+    # One typed array per column; repeated strings are stored as categoricals
+    grid = (n_days, n_slots)
+    slot_idx = np.arange(n_slots, dtype=np.int16)
+
+    df = pd.DataFrame({
+        "date":              np.repeat(all_dates.values, n_slots),
+        "day_of_week":       pd.Categorical.from_codes(
+            _column(dow[:, None], grid, np.int8),
+            ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]),
+        "day_of_week_num":   _column(dow[:, None], grid, np.int8),
+        "season":            pd.Categorical.from_codes(
+            _column(season_code[:, None], grid, np.int8), SEASONS),
+        "departure_time":    pd.Categorical.from_codes(
+            _column(slot_idx, grid, np.int16), SLOT_LABELS),
+        "departure_hour":    _column(SLOT_HOUR, grid, np.int8),
+        "departure_minute":  _column(SLOT_MINUTE, grid, np.int8),
+        "departure_hour_frac": _column(SLOT_DEP_HOUR_FRAC, grid, np.float64),
+        "weather":           pd.Categorical.from_codes(
+            _column(weather_code[:, None], grid, np.int8), WEATHER_TYPES),
+        "crash_on_route":    crash_col,
+        "rush_hour_multiplier": _column(SLOT_RUSH_MULT, grid, np.float64),
+        "base_travel_min":   base_col,
+        "weather_penalty_min": penalty_col,
+        "crash_delay_min":   delay_col,
+        "travel_time_min":   travel_col,
+        "arrival_time":      pd.Categorical.from_codes(arrival_col, CLOCK_LABELS),
+        "distance_miles":    BASE_DISTANCE_MI,
+    })
     return df
 
 
@@ -209,11 +276,12 @@ if __name__ == "__main__":
     print("🚗  Generating commute data (Atlanta → Gainesville)...")
     df = generate_commute_data()
 
-    output_path = os.path.join(os.path.dirname(__file__), "commute_data.csv")
-    df.to_csv(output_path, index=False)
+    # Parquet keeps the dtypes (categoricals become dictionary-encoded columns)
+    output_path = DATA_DIR / "commute_data.parquet"
+    df.to_parquet(output_path, engine="pyarrow", compression="zstd", index=False)
 
     print(f"✅  Saved {len(df):,} records to {output_path}")
-    print(f"   Date range : {df['date'].min()} → {df['date'].max()}")
+    print(f"   Date range : {df['date'].min():%Y-%m-%d} → {df['date'].max():%Y-%m-%d}")
     print(f"   Columns    : {list(df.columns)}")
     print(f"\n📊  Quick stats on travel_time_min:")
-    print(df["travel_time_min"].describe().to_string())
+    print(df["travel_time_min"].describe().round(2).to_string())
@@ -7,82 +7,69 @@ drag-and-drop dashboard building in Tableau / Power BI.
 
 import pandas as pd
 import numpy as np
-import os
+from pathlib import Path
 
 # Load the raw data
-data_dir = os.path.dirname(__file__)
-df = pd.read_csv(os.path.join(data_dir, "commute_data.csv"))
-df["date"] = pd.to_datetime(df["date"])
+DATA_DIR = Path(__file__).resolve().parent
+df = pd.read_parquet(DATA_DIR / "commute_data.parquet")
 
 # ── Enrich with BI-friendly columns ──
 
-# Time period buckets
-def time_period(hour_frac):
-    if hour_frac < 6:
-        return "Early Morning (5-6 AM)"
-    elif hour_frac < 7:
-        return "Pre-Rush (6-7 AM)"
-    elif hour_frac < 9:
-        return "AM Rush Hour (7-9 AM)"
-    elif hour_frac < 11:
-        return "Late Morning (9-11 AM)"
-    elif hour_frac < 13:
-        return "Midday (11 AM-1 PM)"
-    elif hour_frac < 15:
-        return "Early Afternoon (1-3 PM)"
-    elif hour_frac < 16.5:
-        return "Pre-PM Rush (3-4:30 PM)"
-    elif hour_frac < 18.5:
-        return "PM Rush Hour (4:30-6:30 PM)"
-    else:
-        return "Evening (6:30-8 PM)"
-
-df["time_period"] = df["departure_hour_frac"].apply(time_period)
-
-# Time period sort order
-period_order = {
-    "Early Morning (5-6 AM)": 1,
-    "Pre-Rush (6-7 AM)": 2,
-    "AM Rush Hour (7-9 AM)": 3,
-    "Late Morning (9-11 AM)": 4,
-    "Midday (11 AM-1 PM)": 5,
-    "Early Afternoon (1-3 PM)": 6,
-    "Pre-PM Rush (3-4:30 PM)": 7,
-    "PM Rush Hour (4:30-6:30 PM)": 8,
-    "Evening (6:30-8 PM)": 9,
-}
-df["time_period_sort"] = df["time_period"].map(period_order)
-
-# Departure time as formatted string (for labels)
-df["departure_time_label"] = df["departure_hour_frac"].apply(
-    lambda h: f"{int(h):02d}:{int((h % 1) * 60):02d}"
+# Time period buckets (left edge of each period, in hours)
+period_edges = np.array([0, 6, 7, 9, 11, 13, 15, 16.5, 18.5])
+period_labels = [
+    "Early Morning (5-6 AM)",
+    "Pre-Rush (6-7 AM)",
+    "AM Rush Hour (7-9 AM)",
+    "Late Morning (9-11 AM)",
+    "Midday (11 AM-1 PM)",
+    "Early Afternoon (1-3 PM)",
+    "Pre-PM Rush (3-4:30 PM)",
+    "PM Rush Hour (4:30-6:30 PM)",
+    "Evening (6:30-8 PM)",
+]
+period_idx = np.searchsorted(period_edges, df["departure_hour_frac"].to_numpy(), side="right") - 1
+df["time_period"] = pd.Categorical.from_codes(
+    period_idx, dtype=pd.CategoricalDtype(period_labels, ordered=True)
 )
 
-# Hour bucket (rounded)
-df["departure_hour_bucket"] = df["departure_hour"].astype(str).str.zfill(2) + ":00"
+# Time period sort order (1-based, for BI tools reading the CSV)
+df["time_period_sort"] = df["time_period"].cat.codes.astype(np.int8) + 1
 
-# Travel time bins
-def travel_bin(t):
-    if t < 55:
-        return "Fast (< 55 min)"
-    elif t < 65:
-        return "Normal (55-65 min)"
-    elif t < 80:
-        return "Slow (65-80 min)"
-    elif t < 100:
-        return "Very Slow (80-100 min)"
-    else:
-        return "Extreme (100+ min)"
+# Departure time as formatted string (for labels)
+hour_frac = df["departure_hour_frac"].to_numpy()
+hh = np.char.zfill(hour_frac.astype(int).astype(str), 2)
+mm = np.char.zfill(((hour_frac % 1) * 60).astype(int).astype(str), 2)
+df["departure_time_label"] = np.char.add(np.char.add(hh, ":"), mm)
+
+# Hour bucket (rounded); only 24 possible labels, so look them up by hour
+bucket_labels = np.array([f"{h:02d}:00" for h in range(24)])
+df["departure_hour_bucket"] = pd.Categorical(
+    bucket_labels[df["departure_hour"].to_numpy()],
+    categories=bucket_labels[5:21],
+    ordered=True,
+)
 
-df["travel_time_category"] = df["travel_time_min"].apply(travel_bin)
+# Travel time bins (each bin includes its lower edge)
+df["travel_time_category"] = pd.cut(
+    df["travel_time_min"],
+    bins=[-np.inf, 55, 65, 80, 100, np.inf],
+    labels=[
+        "Fast (< 55 min)",
+        "Normal (55-65 min)",
+        "Slow (65-80 min)",
+        "Very Slow (80-100 min)",
+        "Extreme (100+ min)",
+    ],
+    right=False,
+)
 
 # On-time flags (for different target arrivals)
+# arrival_time is a string like "07:45"; parse it to minutes once
+arr = df["arrival_time"].str.split(":", expand=True).astype(np.int16)
+arr_min = arr[0] * 60 + arr[1]
 for target_h in [8, 9, 17, 18]:
-    target_label = f"{target_h:02d}:00"
-    # arrival_time is a string like "07:45"
-    df[f"on_time_{target_h}h"] = df["arrival_time"].apply(
-        lambda a: 1 if a <= target_label else 0
-    )
+    df[f"on_time_{target_h}h"] = (arr_min <= target_h * 60).astype(np.int8)
 
 # Month and year
 df["month"] = df["date"].dt.month
@@ -92,9 +79,10 @@ df["year_month"] = df["date"].dt.strftime("%Y-%m")
 df["week_number"] = df["date"].dt.isocalendar().week.astype(int)
 
 # Is rush hour (boolean for filtering)
-df["is_am_rush"] = ((df["departure_hour_frac"] >= 7.0) & (df["departure_hour_frac"] <= 9.0)).astype(int)
-df["is_pm_rush"] = ((df["departure_hour_frac"] >= 16.5) & (df["departure_hour_frac"] <= 18.5)).astype(int)
-df["is_rush_hour"] = (df["is_am_rush"] | df["is_pm_rush"]).astype(int)
+rush_cols = ["is_am_rush", "is_pm_rush", "is_rush_hour"]
+df["is_am_rush"] = df["departure_hour_frac"].between(7.0, 9.0)
+df["is_pm_rush"] = df["departure_hour_frac"].between(16.5, 18.5)
+df["is_rush_hour"] = df["is_am_rush"] | df["is_pm_rush"]
 
 # Congestion level (rush_hour_multiplier as %)
 df["congestion_pct"] = ((df["rush_hour_multiplier"] - 1) * 100).round(1)
@@ -103,20 +91,23 @@ df["congestion_pct"] = ((df["rush_hour_multiplier"] - 1) * 100).round(1)
 df["total_delay_min"] = (df["weather_penalty_min"] + df["crash_delay_min"]).round(1)
 
 # Weather severity order (for sorting in charts)
-weather_order = {"Clear": 1, "Fog": 2, "Rain": 3, "Heavy Rain": 4}
-df["weather_severity"] = df["weather"].map(weather_order)
+df["weather"] = df["weather"].astype(
+    pd.CategoricalDtype(["Clear", "Fog", "Rain", "Heavy Rain"], ordered=True)
+)
+df["weather_severity"] = df["weather"].cat.codes.astype(np.int8) + 1
 
 # Day type
-df["day_type"] = df["day_of_week"].apply(
-    lambda d: "Mon/Fri (Lighter)" if d in ["Monday", "Friday"] else "Tue-Thu (Heavier)"
+df["day_type"] = np.where(
+    df["day_of_week"].isin(["Monday", "Friday"]), "Mon/Fri (Lighter)", "Tue-Thu (Heavier)"
 )
 
 # Crash label
 df["crash_label"] = df["crash_on_route"].map({0: "No Crash", 1: "Crash on Route"})
 
 # ── Save ──
-output_path = os.path.join(data_dir, "smartcommute_bi_data.csv")
-df.to_csv(output_path, index=False)
+output_path = DATA_DIR / "smartcommute_bi_data.csv"
+# BI tools expect the rush flags as 0/1, so cast them only when writing
+df.astype({col: np.int8 for col in rush_cols}).to_csv(output_path, index=False)
 
 print(f"✅  BI-optimized dataset saved to: {output_path}")
 print(f"   Records: {len(df):,}")
@@ -7,34 +7,44 @@ Run: python3 notebooks/eda.py
 
 import os
 import sys
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # headless backend, also in the worker processes
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 import seaborn as sns
 
 # ── Config ────────────────────────────────────────────────────
-FIG_DIR = os.path.join(os.path.dirname(__file__), "figures")
-DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "commute_data.csv")
-os.makedirs(FIG_DIR, exist_ok=True)
+DAY_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+HERE = Path(__file__).resolve().parent
+FIG_DIR = HERE / "figures"
+DATA_PATH = HERE.parent / "data" / "commute_data.parquet"
+FIG_DIR.mkdir(exist_ok=True)
 
 sns.set_theme(style="whitegrid", palette="muted", font_scale=1.1)
 COLORS = sns.color_palette("husl", 8)
 
+
 # ── Load ──────────────────────────────────────────────────────
-print("📂  Loading data...")
-df = pd.read_csv(DATA_PATH)
-df["date"] = pd.to_datetime(df["date"])
-print(f"   {len(df):,} records loaded.\n")
+def load_data():
+    print("📂  Loading data...")
+    df = pd.read_parquet(DATA_PATH)
+    # Ordered weekday categorical: groupby keys are int8 codes and sort Mon→Fri
+    df["day_of_week"] = df["day_of_week"].astype(pd.CategoricalDtype(DAY_ORDER, ordered=True))
+    print(f"   {len(df):,} records loaded.\n")
+    return df
 
 
 # ──────────────────────────────────────────────────────────────
 # 1. Travel-time distribution by departure hour
 # ──────────────────────────────────────────────────────────────
-def plot_travel_time_by_hour():
+def plot_travel_time_by_hour(data):
     fig, ax = plt.subplots(figsize=(12, 6))
     sns.boxplot(
-        data=df, x="departure_hour", y="travel_time_min",
+        data=data, x="departure_hour", y="travel_time_min",
         palette="YlOrRd", fliersize=1, ax=ax
     )
     ax.set_title("Travel Time Distribution by Departure Hour", fontsize=16, weight="bold")
@@ -43,7 +53,7 @@ def plot_travel_time_by_hour():
     ax.axhline(60, ls="--", color="green", alpha=0.6, label="60 min baseline")
     ax.legend()
     fig.tight_layout()
-    fig.savefig(os.path.join(FIG_DIR, "01_travel_time_by_hour.png"), dpi=150)
+    fig.savefig(FIG_DIR / "01_travel_time_by_hour.png", dpi=150)
     plt.close(fig)
     print("  ✓  01_travel_time_by_hour.png")
 
@@ -51,18 +61,18 @@ def plot_travel_time_by_hour():
 # ──────────────────────────────────────────────────────────────
 # 2. Weather impact on travel time
 # ──────────────────────────────────────────────────────────────
-def plot_weather_impact():
+def plot_weather_impact(data):
     order = ["Clear", "Fog", "Rain", "Heavy Rain"]
     fig, ax = plt.subplots(figsize=(10, 6))
     sns.violinplot(
-        data=df, x="weather", y="travel_time_min",
+        data=data, x="weather", y="travel_time_min",
         order=order, palette="coolwarm", inner="quartile", ax=ax
     )
     ax.set_title("Weather Impact on Travel Time", fontsize=16, weight="bold")
     ax.set_xlabel("Weather Condition", fontsize=13)
     ax.set_ylabel("Travel Time (minutes)", fontsize=13)
     fig.tight_layout()
-    fig.savefig(os.path.join(FIG_DIR, "02_weather_impact.png"), dpi=150)
+    fig.savefig(FIG_DIR / "02_weather_impact.png", dpi=150)
     plt.close(fig)
     print("  ✓  02_weather_impact.png")
 
@@ -70,16 +80,10 @@ def plot_weather_impact():
 # ──────────────────────────────────────────────────────────────
 # 3. Crash frequency by hour and weather
 # ──────────────────────────────────────────────────────────────
-def plot_crash_frequency():
-    crash_rate = (
-        df.groupby(["departure_hour", "weather"])["crash_on_route"]
-        .mean()
-        .reset_index()
-    )
+def plot_crash_frequency(crash_rate):
     fig, ax = plt.subplots(figsize=(12, 6))
     for weather_type in ["Clear", "Rain", "Heavy Rain", "Fog"]:
-        subset = crash_rate[crash_rate["weather"] == weather_type]
-        ax.plot(subset["departure_hour"], subset["crash_on_route"] * 100,
+        ax.plot(crash_rate.index, crash_rate[weather_type] * 100,
                 marker="o", label=weather_type, linewidth=2)
     ax.set_title("Crash Probability by Hour & Weather", fontsize=16, weight="bold")
     ax.set_xlabel("Departure Hour", fontsize=13)
@@ -87,7 +91,7 @@ def plot_crash_frequency():
     ax.legend(title="Weather")
     ax.yaxis.set_major_formatter(ticker.PercentFormatter(decimals=0))
     fig.tight_layout()
-    fig.savefig(os.path.join(FIG_DIR, "03_crash_frequency.png"), dpi=150)
+    fig.savefig(FIG_DIR / "03_crash_frequency.png", dpi=150)
     plt.close(fig)
     print("  ✓  03_crash_frequency.png")
 
@@ -95,16 +99,7 @@ def plot_crash_frequency():
 # ──────────────────────────────────────────────────────────────
 # 4. Day-of-week heatmap
 # ──────────────────────────────────────────────────────────────
-def plot_dow_heatmap():
-    pivot = df.pivot_table(
-        values="travel_time_min",
-        index="day_of_week",
-        columns="departure_hour",
-        aggfunc="mean"
-    )
-    day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-    pivot = pivot.reindex(day_order)
-
+def plot_dow_heatmap(pivot):
     fig, ax = plt.subplots(figsize=(14, 5))
     sns.heatmap(pivot, cmap="YlOrRd", annot=True, fmt=".0f", linewidths=0.5, ax=ax)
     ax.set_title("Avg Travel Time (min) — Day of Week × Departure Hour",
@@ -112,7 +107,7 @@ def plot_dow_heatmap():
     ax.set_xlabel("Departure Hour", fontsize=13)
     ax.set_ylabel("")
     fig.tight_layout()
-    fig.savefig(os.path.join(FIG_DIR, "04_dow_heatmap.png"), dpi=150)
+    fig.savefig(FIG_DIR / "04_dow_heatmap.png", dpi=150)
     plt.close(fig)
     print("  ✓  04_dow_heatmap.png")
 
@@ -120,20 +115,14 @@ def plot_dow_heatmap():
 # ──────────────────────────────────────────────────────────────
 # 5. Correlation matrix
 # ──────────────────────────────────────────────────────────────
-def plot_correlation_matrix():
-    numeric_cols = [
-        "departure_hour_frac", "day_of_week_num", "crash_on_route",
-        "rush_hour_multiplier", "base_travel_min", "weather_penalty_min",
-        "crash_delay_min", "travel_time_min"
-    ]
-    corr = df[numeric_cols].corr()
+def plot_correlation_matrix(corr):
     fig, ax = plt.subplots(figsize=(10, 8))
     mask = np.triu(np.ones_like(corr, dtype=bool))
     sns.heatmap(corr, mask=mask, annot=True, fmt=".2f", cmap="RdBu_r",
                 center=0, linewidths=0.5, ax=ax)
     ax.set_title("Feature Correlation Matrix", fontsize=16, weight="bold")
     fig.tight_layout()
-    fig.savefig(os.path.join(FIG_DIR, "05_correlation_matrix.png"), dpi=150)
+    fig.savefig(FIG_DIR / "05_correlation_matrix.png", dpi=150)
     plt.close(fig)
     print("  ✓  05_correlation_matrix.png")
 
@@ -141,11 +130,7 @@ def plot_correlation_matrix():
 # ──────────────────────────────────────────────────────────────
 # 6. Percentile ribbons by departure time
 # ──────────────────────────────────────────────────────────────
-def plot_percentile_ribbon():
-    pcts = df.groupby("departure_hour_frac")["travel_time_min"].quantile(
-        [0.50, 0.75, 0.90, 0.95]
-    ).unstack()
-
+def plot_percentile_ribbon(pcts):
     fig, ax = plt.subplots(figsize=(14, 7))
 
     ax.fill_between(pcts.index, pcts[0.50], pcts[0.95],
@@ -168,7 +153,7 @@ def plot_percentile_ribbon():
     ax.set_xticklabels([f"{h}:00" for h in hours])
 
     fig.tight_layout()
-    fig.savefig(os.path.join(FIG_DIR, "06_percentile_ribbon.png"), dpi=150)
+    fig.savefig(FIG_DIR / "06_percentile_ribbon.png", dpi=150)
     plt.close(fig)
     print("  ✓  06_percentile_ribbon.png")
 
@@ -176,18 +161,18 @@ def plot_percentile_ribbon():
 # ──────────────────────────────────────────────────────────────
 # 7. Travel time distribution (overall)
 # ──────────────────────────────────────────────────────────────
-def plot_overall_distribution():
+def plot_overall_distribution(travel_time, median, q95):
     fig, ax = plt.subplots(figsize=(12, 5))
-    sns.histplot(df["travel_time_min"], bins=80, kde=True, color="steelblue", ax=ax)
-    ax.axvline(df["travel_time_min"].median(), color="red", ls="--", label=f"Median: {df['travel_time_min'].median():.0f} min")
-    ax.axvline(df["travel_time_min"].quantile(0.95), color="darkred", ls=":",
-               label=f"95th pctl: {df['travel_time_min'].quantile(0.95):.0f} min")
+    sns.histplot(travel_time, bins=80, kde=True, color="steelblue", ax=ax)
+    ax.axvline(median, color="red", ls="--", label=f"Median: {median:.0f} min")
+    ax.axvline(q95, color="darkred", ls=":",
+               label=f"95th pctl: {q95:.0f} min")
     ax.set_title("Overall Travel Time Distribution", fontsize=16, weight="bold")
     ax.set_xlabel("Travel Time (minutes)", fontsize=13)
     ax.set_ylabel("Count", fontsize=13)
     ax.legend()
     fig.tight_layout()
-    fig.savefig(os.path.join(FIG_DIR, "07_overall_distribution.png"), dpi=150)
+    fig.savefig(FIG_DIR / "07_overall_distribution.png", dpi=150)
     plt.close(fig)
     print("  ✓  07_overall_distribution.png")
 
@@ -195,13 +180,7 @@ def plot_overall_distribution():
 # ──────────────────────────────────────────────────────────────
 # 8. Monthly trend
 # ──────────────────────────────────────────────────────────────
-def plot_monthly_trend():
-    monthly = df.groupby(df["date"].dt.to_period("M"))["travel_time_min"].agg(
-        ["mean", "median", lambda x: x.quantile(0.95)]
-    )
-    monthly.columns = ["Mean", "Median", "95th Percentile"]
-    monthly.index = monthly.index.to_timestamp()
-
+def plot_monthly_trend(monthly):
     fig, ax = plt.subplots(figsize=(14, 5))
     for col, style in zip(monthly.columns, ["-", "--", ":"]):
         ax.plot(monthly.index, monthly[col], linestyle=style, marker="o",
@@ -211,22 +190,73 @@ def plot_monthly_trend():
     ax.set_ylabel("Travel Time (minutes)", fontsize=13)
     ax.legend()
     fig.tight_layout()
-    fig.savefig(os.path.join(FIG_DIR, "08_monthly_trend.png"), dpi=150)
+    fig.savefig(FIG_DIR / "08_monthly_trend.png", dpi=150)
     plt.close(fig)
     print("  ✓  08_monthly_trend.png")
 
 
+# ──────────────────────────────────────────────────────────────
+# Shared aggregates
+# ──────────────────────────────────────────────────────────────
+def compute_aggregates(df):
+    """Reduce the table once; each plot then only draws its pre-reduced frame."""
+    travel = df["travel_time_min"]
+
+    monthly = df.groupby(df["date"].dt.to_period("M"))["travel_time_min"].agg(
+        ["mean", "median", lambda x: x.quantile(0.95)]
+    )
+    monthly.columns = ["Mean", "Median", "95th Percentile"]
+    monthly.index = monthly.index.to_timestamp()
+
+    numeric_cols = [
+        "departure_hour_frac", "day_of_week_num", "crash_on_route",
+        "rush_hour_multiplier", "base_travel_min", "weather_penalty_min",
+        "crash_delay_min", "travel_time_min"
+    ]
+
+    return {
+        # Hours down the rows, one column per weather
+        "crash_rate": (
+            df.groupby(["departure_hour", "weather"], observed=True)["crash_on_route"]
+            .mean()
+            .unstack("weather")
+        ),
+        "dow_pivot": (
+            df.groupby(["day_of_week", "departure_hour"], observed=True)["travel_time_min"]
+            .mean()
+            .unstack("departure_hour")
+        ),
+        "corr": df[numeric_cols].corr(),
+        "hourly_q": travel.groupby(df["departure_hour_frac"]).quantile(
+            [0.50, 0.75, 0.90, 0.95]
+        ).unstack(),
+        "median": travel.median(),
+        "q95": travel.quantile(0.95),
+        "monthly": monthly,
+    }
+
+
 # ──────────────────────────────────────────────────────────────
 # Run all
 # ──────────────────────────────────────────────────────────────
 if __name__ == "__main__":
+    df = load_data()
     print("🎨  Generating EDA visualizations...\n")
-    plot_travel_time_by_hour()
-    plot_weather_impact()
-    plot_crash_frequency()
-    plot_dow_heatmap()
-    plot_correlation_matrix()
-    plot_percentile_ribbon()
-    plot_overall_distribution()
-    plot_monthly_trend()
+    agg = compute_aggregates(df)
+    tasks = [
+        (plot_travel_time_by_hour, df[["departure_hour", "travel_time_min"]]),
+        (plot_weather_impact, df[["weather", "travel_time_min"]]),
+        (plot_crash_frequency, agg["crash_rate"]),
+        (plot_dow_heatmap, agg["dow_pivot"]),
+        (plot_correlation_matrix, agg["corr"]),
+        (plot_percentile_ribbon, agg["hourly_q"]),
+        (plot_overall_distribution, df["travel_time_min"], agg["median"], agg["q95"]),
+        (plot_monthly_trend, agg["monthly"]),
+    ]
+
+    # Each plot writes its own PNG, so render them in separate processes
+    with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as ex:
+        futures = [ex.submit(fn, *args) for fn, *args in tasks]
+        for fut in futures:
+            fut.result()
     print(f"\n✅  All figures saved to {FIG_DIR}/")
@@ -7,33 +7,133 @@ optimal (latest) departure time that ensures on-time arrival.
 Can be used as a module or run standalone for quick checks.
 """
 
-import os
 import sys
+from functools import lru_cache
+from pathlib import Path
 import numpy as np
 import joblib
-from datetime import datetime, timedelta
 
 
 # ── Load model artifacts ──────────────────────────────────────
-MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
+MODEL_DIR = Path(__file__).resolve().parent.parent / "models"
+BASELINE_DISTANCE_MI = 54  # length of the ATL→GNV route the models were trained on
 
 
+@lru_cache(maxsize=1)
 def load_models():
-    """Load all quantile models, encoder, and feature list."""
+    """
+    Load all quantile models, the weather → code mapping, and feature list.
+
+    The artifacts are read from disk once per process; later calls return
+    the same (shared) objects, so callers must not mutate them.
+    """
     quantiles = [0.50, 0.75, 0.90, 0.95]
     models = {}
     for q in quantiles:
         fname = f"quantile_{int(q*100):02d}_model.joblib"
-        path = os.path.join(MODEL_DIR, fname)
-        models[q] = joblib.load(path)
+        models[q] = joblib.load(MODEL_DIR / fname)
+
+    categories_path = MODEL_DIR / "weather_categories.joblib"
+    if categories_path.exists():
+        weather_categories = joblib.load(categories_path)
+    else:
+        # Artifacts trained before the switch to categorical codes
+        le = joblib.load(MODEL_DIR / "weather_encoder.joblib")
+        weather_categories = le.classes_.tolist()
+    feature_cols = joblib.load(MODEL_DIR / "feature_cols.joblib")
+
+    # Code = position in the saved category list
+    weather_to_idx = {c: i for i, c in enumerate(weather_categories)}
+
+    return models, weather_to_idx, feature_cols
+
+
+def hhmm_to_min(s):
+    """Convert an "HH:MM" string to minutes after midnight."""
+    h, m = s.split(":")
+    return int(h) * 60 + int(m)
+
+
+def min_to_hhmm(t):
+    """Convert minutes after midnight to an "HH:MM" string (wraps past 24h)."""
+    t = int(t) % 1440
+    return f"{t // 60:02d}:{t % 60:02d}"
+
+
+# "HH:MM" label for every minute of the day, for converting whole arrays
+CLOCK_LABELS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)])
+
+
+def pick_latest(on_time):
+    """
+    Index of the last True in a boolean array, or -1 if there is none.
+
+    Scans from the end with argmax, so no index array is materialized.
+    """
+    if not on_time.size:
+        return -1
+    rev = on_time[::-1]
+    i = int(np.argmax(rev))
+    return on_time.shape[0] - 1 - i if rev[i] else -1
 
-    le_weather = joblib.load(os.path.join(MODEL_DIR, "weather_encoder.joblib"))
-    feature_cols = joblib.load(os.path.join(MODEL_DIR, "feature_cols.joblib"))
 
-    return models, le_weather, feature_cols
+def _feature_matrix(weather_to_idx, departure_hour_frac, day_of_week_num, weather):
+    """Encode a batch of departures as the float32 model input matrix."""
+    try:
+        if isinstance(weather, str):
+            weather_codes = weather_to_idx[weather]
+        else:
+            weather_codes = [weather_to_idx[w] for w in weather]
+    except KeyError as e:
+        raise ValueError(f"Unknown weather condition {e.args[0]!r}") from None
+
+    departure_hour_frac = np.asarray(departure_hour_frac, dtype=np.float32)
+
+    # Same column order as FEATURE_COLS in models/train_model.py
+    X = np.empty((departure_hour_frac.shape[0], 3), dtype=np.float32)
+    X[:, 0] = departure_hour_frac
+    X[:, 1] = day_of_week_num
+    X[:, 2] = weather_codes
+    return X
+
+
+def predict_many(models, weather_to_idx, departure_hour_frac, day_of_week_num,
+                 weather, quantile=0.95):
+    """
+    Predict travel times for many feature rows with a single model call.
+
+    Parameters
+    ----------
+    departure_hour_frac : array of float      – e.g. [7.5, 7.75, ...]
+    day_of_week_num     : int or array of int – 0=Mon, 4=Fri
+    weather             : str or array of str – "Clear", "Rain", "Heavy Rain", "Fog"
+    quantile            : float               – 0.50, 0.75, 0.90, or 0.95
+
+    Returns
+    -------
+    np.ndarray : predicted travel times in minutes, one per departure
+    """
+    X = _feature_matrix(weather_to_idx, departure_hour_frac, day_of_week_num, weather)
+    return models[quantile].predict(X)
+
+
+def predict_quantiles(models, weather_to_idx, departure_hour_frac, day_of_week_num,
+                      weather, quantiles=(0.50, 0.75, 0.90, 0.95)):
+    """
+    Predict the same departures at several quantiles, encoding the inputs once.
+
+    Returns
+    -------
+    np.ndarray : shape (len(quantiles), n_departures), rows in `quantiles` order
+    """
+    X = _feature_matrix(weather_to_idx, departure_hour_frac, day_of_week_num, weather)
+    out = np.empty((len(quantiles), X.shape[0]))
+    for i, q in enumerate(quantiles):
+        out[i] = models[q].predict(X)
+    return out
 
 
-def predict_travel_time(models, le_weather, departure_hour_frac,
+def predict_travel_time(models, weather_to_idx, departure_hour_frac,
                         day_of_week_num, weather, quantile=0.95):
     """
     Predict travel time at the given quantile.
@@ -49,15 +149,60 @@ def predict_travel_time(models, le_weather, departure_hour_frac,
     -------
     float : predicted travel time in minutes
     """
-    weather_enc = le_weather.transform([weather])[0]
-    X = np.array([[departure_hour_frac, day_of_week_num, weather_enc]])
-    return models[quantile].predict(X)[0]
+    return predict_many(models, weather_to_idx, [departure_hour_frac],
+                        day_of_week_num, weather, quantile)[0]
+
+
+def _summarize_sweep(departures, dep_fracs, predictions, target_arrival_time,
+                     weather, confidence, return_candidates):
+    """Pick the latest on-time slot of a scaled sweep and build the result dict."""
+    target = hhmm_to_min(target_arrival_time)
+    arrivals = departures + predictions
+    buffers = target - arrivals
+    on_time = arrivals <= target
 
+    # We want the LATEST on-time slot
+    best = pick_latest(on_time)
 
-def find_optimal_departure(models, le_weather, target_arrival_time,
+    candidates = None
+    if return_candidates:
+        # Labels come from whole-minute indices (arrivals truncate, as in min_to_hhmm)
+        dep_labels = CLOCK_LABELS[departures % 1440]
+        arr_labels = CLOCK_LABELS[arrivals.astype(np.int64) % 1440]
+        candidates = [
+            {
+                "departure":         dep,
+                "departure_frac":    frac,
+                "predicted_travel":  pred,
+                "predicted_arrival": arr,
+                "on_time":           ok,
+                "buffer_min":        buf,
+            }
+            for dep, frac, pred, arr, ok, buf in zip(
+                dep_labels.tolist(), dep_fracs.tolist(), predictions.round(1).tolist(),
+                arr_labels.tolist(), on_time.tolist(), buffers.round(1).tolist(),
+            )
+        ]
+
+    found = best >= 0
+    result = {
+        "recommended_departure": min_to_hhmm(departures[best]) if found else None,
+        "predicted_travel_min":  round(float(predictions[best]), 1) if found else None,
+        "predicted_arrival":     min_to_hhmm(arrivals[best]) if found else None,
+        "buffer_minutes":        round(float(buffers[best]), 1) if found else None,
+        "confidence_level":      confidence,
+        "target_arrival":        target_arrival_time,
+        "weather":               weather,
+        "all_candidates":        candidates,
+    }
+    return result
+
+
+def find_optimal_departure(models, weather_to_idx, target_arrival_time,
                            day_of_week_num, weather, confidence=0.95,
                            search_start="05:00", search_end="20:00",
-                           step_minutes=5, distance_scale=1.0):
+                           step_minutes=5, distance_scale=1.0,
+                           return_candidates=False):
     """
     Find the LATEST departure time such that:
         departure + predicted_travel_time(q=confidence) * distance_scale <= target_arrival
@@ -68,7 +213,10 @@ def find_optimal_departure(models, le_weather, target_arrival_time,
     day_of_week_num     : int   – 0=Mon, 4=Fri
     weather             : str   – weather condition
     confidence          : float – quantile confidence level (0.50–0.95)
-    distance_scale      : float – multiplier relative to baseline 55-mi route (default 1.0)
+    distance_scale      : float – multiplier relative to baseline 54-mi route (default 1.0)
+    return_candidates   : bool  – also build the per-slot candidate list (default False)
+
+    Pass models=None to use the cached artifacts from load_models().
 
     Returns
     -------
@@ -77,54 +225,96 @@ def find_optimal_departure(models, le_weather, target_arrival_time,
         - predicted_travel_min  : float
         - predicted_arrival     : str  ("HH:MM")
         - buffer_minutes        : float (minutes of slack)
-        - all_candidates        : list of dicts (for visualization)
+        - all_candidates        : list of dicts (for visualization), or None
+                                  unless return_candidates=True
     """
-    target = datetime.strptime(target_arrival_time, "%H:%M")
+    if models is None:
+        models, weather_to_idx, _ = load_models()
 
-    start = datetime.strptime(search_start, "%H:%M")
-    end   = datetime.strptime(search_end, "%H:%M")
+    start = hhmm_to_min(search_start)
+    end   = hhmm_to_min(search_end)
 
-    candidates = []
-    best = None
+    # All times below are minutes after midnight
+    departures = np.arange(start, end + 1, step_minutes)
+    dep_fracs = departures / 60.0
 
-    current = start
-    while current <= end:
-        dep_hour_frac = current.hour + current.minute / 60.0
-        predicted_min = predict_travel_time(
-            models, le_weather, dep_hour_frac, day_of_week_num,
-            weather, quantile=confidence
-        ) * distance_scale
-        predicted_arrival = current + timedelta(minutes=float(predicted_min))
+    # One batched prediction for the whole sweep, rescaled in place
+    predictions = predict_many(
+        models, weather_to_idx, dep_fracs, day_of_week_num,
+        weather, quantile=confidence
+    )
+    predictions *= distance_scale
+    return _summarize_sweep(
+        departures, dep_fracs, predictions, target_arrival_time, weather,
+        confidence, return_candidates,
+    )
 
-        on_time = predicted_arrival <= target
-        buffer = (target - predicted_arrival).total_seconds() / 60.0
 
-        candidate = {
-            "departure":         current.strftime("%H:%M"),
-            "departure_frac":    dep_hour_frac,
-            "predicted_travel":  round(predicted_min, 1),
-            "predicted_arrival": predicted_arrival.strftime("%H:%M"),
-            "on_time":           on_time,
-            "buffer_min":        round(buffer, 1),
-        }
-        candidates.append(candidate)
+def find_optimal_departures(models, weather_to_idx, target_arrival_time,
+                            day_of_week_num, weather,
+                            confidences=(0.50, 0.75, 0.90, 0.95),
+                            search_start="05:00", search_end="20:00",
+                            step_minutes=5, distance_scale=1.0,
+                            return_candidates=False):
+    """
+    find_optimal_departure at several confidence levels at once.
 
-        if on_time:
-            best = candidate  # keep updating — we want the LATEST on-time slot
+    The sweep's feature matrix is built once and every quantile model runs
+    over it (see predict_quantiles). Returns {confidence: result}, each
+    result shaped like find_optimal_departure's.
+    """
+    if models is None:
+        models, weather_to_idx, _ = load_models()
 
-        current += timedelta(minutes=step_minutes)
+    departures = np.arange(hhmm_to_min(search_start), hhmm_to_min(search_end) + 1, step_minutes)
+    dep_fracs = departures / 60.0
 
-    result = {
-        "recommended_departure": best["departure"] if best else None,
-        "predicted_travel_min":  best["predicted_travel"] if best else None,
-        "predicted_arrival":     best["predicted_arrival"] if best else None,
-        "buffer_minutes":        best["buffer_min"] if best else None,
-        "confidence_level":      confidence,
-        "target_arrival":        target_arrival_time,
-        "weather":               weather,
-        "all_candidates":        candidates,
+    predictions = predict_quantiles(
+        models, weather_to_idx, dep_fracs, day_of_week_num, weather, quantiles=confidences
+    )
+    predictions *= distance_scale
+    return {
+        q: _summarize_sweep(
+            departures, dep_fracs, pred, target_arrival_time, weather, q, return_candidates,
+        )
+        for q, pred in zip(confidences, predictions)
     }
-    return result
+
+
+def plan_commute(origin_address, dest_address, target_arrival_time, confidence=0.95):
+    """
+    Plan tomorrow's commute end to end: route the trip, read tomorrow's
+    forecast at the destination, and find the latest safe departure.
+
+    The route length sets distance_scale once for the whole sweep; geocodes
+    and forecasts come from the live-data response cache when warm.
+
+    Returns the find_optimal_departure result plus:
+        success  : bool
+        route    : dict from get_driving_info
+        forecast : dict from get_tomorrow_forecast
+        error    : str (only when success is False)
+    """
+    # Imported here so the optimizer itself has no network dependency
+    from services.live_data import get_driving_info, get_tomorrow_forecast
+
+    route = get_driving_info(origin_address, dest_address)
+    if not route["success"]:
+        return {"success": False, "error": route.get("error", "Routing failed")}
+
+    forecast = get_tomorrow_forecast(*route["dest_coords"])
+    if forecast is None:
+        return {"success": False, "error": "Weather forecast unavailable", "route": route}
+    if forecast["day_of_week_num"] >= 5:
+        return {"success": False, "error": "Tomorrow is not a weekday", "route": route,
+                "forecast": forecast}
+
+    result = find_optimal_departure(
+        None, None, target_arrival_time, forecast["day_of_week_num"],
+        forecast["weather_category"], confidence,
+        distance_scale=route["distance_mi"] / BASELINE_DISTANCE_MI,
+    )
+    return {"success": True, "route": route, "forecast": forecast, **result}
 
 
 # ── CLI ───────────────────────────────────────────────────────
@@ -132,7 +322,7 @@ if __name__ == "__main__":
     print("🧭  Departure Time Optimizer")
     print("=" * 50)
 
-    models, le_weather, feature_cols = load_models()
+    models, weather_to_idx, feature_cols = load_models()
 
     # Example: arrive by 8:30 AM on a Wednesday, rainy day
     scenarios = [
@@ -146,7 +336,7 @@ if __name__ == "__main__":
     for target, dow, weather, conf in scenarios:
         days = ["Mon", "Tue", "Wed", "Thu", "Fri"]
         result = find_optimal_departure(
-            models, le_weather, target, dow, weather, conf
+            models, weather_to_idx, target, dow, weather, conf
         )
         rec = result["recommended_departure"]
         travel = result["predicted_travel_min"]
@@ -7,15 +7,183 @@ Free APIs, no keys required:
 """
 
 import json
-import urllib.request
+import os
+import sqlite3
+import threading
+import time
 import urllib.parse
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+
+# orjson parses the API payloads several times faster and reads bytes
+# directly; it is optional, so fall back to the standard library.
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+
+# ── Shared HTTP session ───────────────────────────────────────
+# One pooled keep-alive session per process, so repeat calls to the same
+# host (Nominatim, OSRM, Open-Meteo) skip the TCP + TLS handshake.
+_SESSION = requests.Session()
+# All three APIs compress JSON on request; urllib3 decodes transparently.
+# ACCEPT_ENCODING is "gzip,deflate", plus br/zstd when those decoders are installed.
+_SESSION.headers.update({
+    "User-Agent": "SmartCommute/1.0",
+    "Connection": "keep-alive",
+    "Accept": "application/json",
+    "Accept-Encoding": ACCEPT_ENCODING,
+})
+_RETRY = Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504))
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=_RETRY)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# Dedicated adapter per API host, sized for how many requests each one
+# sees at once (Nominatim: one, see _nominatim_get; OSRM and
+# Open-Meteo: one call per page load). The longest mounted prefix wins.
+_HOST_POOL_SIZES = {
+    "https://nominatim.openstreetmap.org/": 1,
+    "https://router.project-osrm.org/": 2,
+    "https://api.open-meteo.com/": 2,
+}
+for _prefix, _size in _HOST_POOL_SIZES.items():
+    _SESSION.mount(
+        _prefix,
+        HTTPAdapter(pool_connections=1, pool_maxsize=_size, pool_block=False, max_retries=_RETRY),
+    )
+
+
+# ── Response cache ────────────────────────────────────────────
+# Successful JSON responses are memoized in-process (LRU) and in a small
+# SQLite file, so repeat lookups survive app restarts. Errors and empty
+# payloads are never stored.
+CACHE_PATH = (
+    Path(os.environ.get("SMARTCOMMUTE_CACHE_DIR", Path.home() / ".cache" / "smartcommute"))
+    / "responses.sqlite"
+)
+GEOCODE_TTL_S = 30 * 24 * 3600
+WEATHER_TTL_S = 3600
+
+
+class _ResponseCache:
+    """TTL'd key → JSON store: an in-memory LRU in front of SQLite."""
+
+    def __init__(self, path, maxsize=1024):
+        self.path = path
+        self.maxsize = maxsize
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across threads;
+        # commit (or roll back) the transaction, then always close it
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=2)
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses "
+                    "(key TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+                )
+                yield conn
+        finally:
+            conn.close()
+
+    def _remember(self, key, expires_at, value):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit and hit[0] > now:
+                self._memory.move_to_end(key)
+                return hit[1]
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT expires_at, value FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+        except (sqlite3.Error, OSError):
+            return None
+        if row and row[0] > now:
+            value = _json_loads(row[1])
+            self._remember(key, row[0], value)
+            return value
+        return None
+
+    def set(self, key, value, ttl):
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, value)
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                    (key, expires_at, json.dumps(value)),
+                )
+        except (sqlite3.Error, OSError):
+            pass  # disk cache is best-effort; the in-memory copy still helps
+
+
+_CACHE = _ResponseCache(CACHE_PATH)
+
+
+def _get_json(url, timeout, ttl, key=None, throttled=False):
+    """GET `url` as JSON through the response cache (keyed by `key` or the URL)."""
+    key = key or url
+    data = _CACHE.get(key)
+    if data is None:
+        if throttled:
+            resp = _nominatim_get(url, timeout=timeout)
+        else:
+            resp = _SESSION.get(url, timeout=timeout)
+        resp.raise_for_status()
+        data = _json_loads(resp.content)
+        if data:
+            _CACHE.set(key, data, ttl)
+    return data
 
 
 # ══════════════════════════════════════════════════════════════
 # GEOCODING (Nominatim — free, no key)
 # ══════════════════════════════════════════════════════════════
 
+# Nominatim's usage policy allows at most one request per second, so every
+# request to it goes through one lock and waits out the interval.
+NOMINATIM_MIN_INTERVAL_S = 1.0
+_NOMINATIM_LOCK = threading.Lock()
+_nominatim_last = 0.0
+
+
+def _nominatim_get(url, timeout):
+    """GET a Nominatim URL, one request at a time and at least 1 s apart."""
+    global _nominatim_last
+    with _NOMINATIM_LOCK:
+        wait = _nominatim_last + NOMINATIM_MIN_INTERVAL_S - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            return _SESSION.get(url, timeout=timeout)
+        finally:
+            _nominatim_last = time.monotonic()
+
+
 def geocode(address):
     """
     Geocode an address to (lat, lon) using OpenStreetMap Nominatim.
@@ -27,20 +195,36 @@ def geocode(address):
             f"https://nominatim.openstreetmap.org/search"
             f"?q={encoded}&format=json&limit=1"
         )
-        req = urllib.request.Request(url, headers={"User-Agent": "SmartCommute/1.0"})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            data = json.loads(resp.read().decode())
-            if data:
-                return (
-                    float(data[0]["lat"]),
-                    float(data[0]["lon"]),
-                    data[0].get("display_name", address),
-                )
+        data = _get_json(url, timeout=10, ttl=GEOCODE_TTL_S, throttled=True)
+        if data:
+            return (
+                float(data[0]["lat"]),
+                float(data[0]["lon"]),
+                data[0].get("display_name", address),
+            )
     except Exception as e:
         print(f"Geocoding error for '{address}': {e}")
     return None
 
 
+# Autocomplete results by (normalized query, limit), most recent last
+_AUTOCOMPLETE_CACHE = OrderedDict()
+_AUTOCOMPLETE_MAXSIZE = 256
+_AUTOCOMPLETE_LOCK = threading.Lock()
+
+
+def _cached_suggestions(query, limit):
+    """
+    Exact-key hit from the autocomplete cache, or None. Nominatim matches on
+    tokens, so a longer query's results cannot be derived from a shorter one's.
+    """
+    with _AUTOCOMPLETE_LOCK:
+        hit = _AUTOCOMPLETE_CACHE.get((query, limit))
+        if hit is not None:
+            _AUTOCOMPLETE_CACHE.move_to_end((query, limit))
+        return hit
+
+
 def search_addresses(query, limit=5):
     """
     Search for address suggestions matching a partial query.
@@ -48,6 +232,10 @@ def search_addresses(query, limit=5):
     """
     if not query or len(query.strip()) < 3:
         return []
+    key = query.strip().lower()
+    cached = _cached_suggestions(key, limit)
+    if cached is not None:
+        return cached
     try:
         encoded = urllib.parse.quote(query)
         url = (
@@ -55,10 +243,18 @@ def search_addresses(query, limit=5):
             f"?q={encoded}&format=json&limit={limit}&addressdetails=1"
             f"&countrycodes=us"
         )
-        req = urllib.request.Request(url, headers={"User-Agent": "SmartCommute/1.0"})
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            data = json.loads(resp.read().decode())
-            return [item.get("display_name", "") for item in data if item.get("display_name")]
+        resp = _nominatim_get(url, timeout=8)
+        resp.raise_for_status()
+        data = _json_loads(resp.content)
+        results = [item.get("display_name", "") for item in data if item.get("display_name")]
+        if not results:
+            return results  # partial words often match nothing yet; don't pin that
+        with _AUTOCOMPLETE_LOCK:
+            _AUTOCOMPLETE_CACHE[(key, limit)] = results
+            _AUTOCOMPLETE_CACHE.move_to_end((key, limit))
+            while len(_AUTOCOMPLETE_CACHE) > _AUTOCOMPLETE_MAXSIZE:
+                _AUTOCOMPLETE_CACHE.popitem(last=False)
+        return results
     except Exception as e:
         print(f"Address search error for '{query}': {e}")
     return []
@@ -81,6 +277,7 @@ def get_driving_info(origin_address, dest_address):
         dest_name      : str
         success        : bool
     """
+    # Nominatim allows one request per second, so look the two up in turn
     origin = geocode(origin_address)
     dest = geocode(dest_address)
 
@@ -98,9 +295,9 @@ def get_driving_info(origin_address, dest_address):
     )
 
     try:
-        req = urllib.request.Request(url, headers={"User-Agent": "SmartCommute/1.0"})
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            data = json.loads(resp.read().decode())
+        resp = _SESSION.get(url, timeout=15)
+        resp.raise_for_status()
+        data = _json_loads(resp.content)
 
         if data.get("code") == "Ok" and data.get("routes"):
             route = data["routes"][0]
@@ -122,6 +319,68 @@ def get_driving_info(origin_address, dest_address):
     return {"success": False, "error": "Routing failed"}
 
 
+def get_driving_matrix(origin_addresses, dest_addresses):
+    """
+    Driving distance and base travel time for every origin × destination
+    pair, from a single OSRM table request.
+
+    Returns dict:
+        distance_mi    : np.ndarray (n_origins, n_dests), miles; NaN if unroutable
+        duration_min   : np.ndarray (n_origins, n_dests), minutes, no traffic
+        origin_coords  : list of (lat, lon)
+        dest_coords    : list of (lat, lon)
+        origin_names   : list of str
+        dest_names     : list of str
+        success        : bool
+    """
+    addresses = list(origin_addresses) + list(dest_addresses)
+    n_origins = len(origin_addresses)
+    if not n_origins or len(addresses) == n_origins:
+        return {"success": False, "error": "Need at least one origin and one destination"}
+
+    # Nominatim allows one request per second, so geocode in turn
+    places = [geocode(a) for a in addresses]
+
+    missing = [a for a, p in zip(addresses, places) if not p]
+    if missing:
+        return {"success": False, "error": f"Could not geocode: {', '.join(missing)}"}
+
+    # OSRM uses lon,lat format; sources/destinations index into the coordinate list
+    coords = ";".join(f"{p[1]},{p[0]}" for p in places)
+    sources = ";".join(str(i) for i in range(n_origins))
+    destinations = ";".join(str(i) for i in range(n_origins, len(places)))
+    url = (
+        f"https://router.project-osrm.org/table/v1/driving/{coords}"
+        f"?sources={sources}&destinations={destinations}"
+        f"&annotations=distance,duration"
+    )
+
+    try:
+        resp = _SESSION.get(url, timeout=15)
+        resp.raise_for_status()
+        data = _json_loads(resp.content)
+
+        if data.get("code") == "Ok":
+            # Unroutable pairs come back as null → NaN
+            distance_m = np.array(data["distances"], dtype=float)   # meters
+            duration_s = np.array(data["durations"], dtype=float)   # seconds
+            origins, dests = places[:n_origins], places[n_origins:]
+
+            return {
+                "success": True,
+                "distance_mi": np.round(distance_m / 1609.344, 1),
+                "duration_min": np.round(duration_s / 60, 1),
+                "origin_coords": [(p[0], p[1]) for p in origins],
+                "dest_coords": [(p[0], p[1]) for p in dests],
+                "origin_names": [p[2] for p in origins],
+                "dest_names": [p[2] for p in dests],
+            }
+    except Exception as e:
+        print(f"OSRM table error: {e}")
+
+    return {"success": False, "error": "Routing failed"}
+
+
 # ══════════════════════════════════════════════════════════════
 # WEATHER FORECAST (Open-Meteo — free, no key)
 # ══════════════════════════════════════════════════════════════
@@ -170,6 +429,28 @@ WMO_DESCRIPTIONS = {
     95: "Thunderstorm", 96: "Thunderstorm + hail", 99: "Severe thunderstorm + hail",
 }
 
+# Dense lookup tables over the WMO code range (0–99) so a whole forecast
+# decodes with one gather; the extra last slot catches missing or
+# out-of-range codes.
+_WMO_UNKNOWN = 100
+_WMO_CAT_LUT = np.full(_WMO_UNKNOWN + 1, "Clear", dtype=object)
+_WMO_DESC_LUT = np.array([f"Code {c}" for c in range(_WMO_UNKNOWN)] + ["Unknown"], dtype=object)
+for _code, _category in WMO_TO_CATEGORY.items():
+    _WMO_CAT_LUT[_code] = _category
+for _code, _desc in WMO_DESCRIPTIONS.items():
+    _WMO_DESC_LUT[_code] = _desc
+
+_DAY_NAMES = np.array(
+    ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+)
+
+
+def _wmo_lookup_index(codes):
+    """Map raw WMO codes (None allowed) to rows of the lookup tables."""
+    codes = np.asarray(codes, dtype=float)
+    valid = (codes >= 0) & (codes < _WMO_UNKNOWN)
+    return np.where(valid, codes, _WMO_UNKNOWN).astype(np.intp)
+
 
 def get_weather_forecast(lat, lon, days=3):
     """
@@ -195,29 +476,40 @@ def get_weather_forecast(lat, lon, days=3):
         f"&forecast_days={days}"
     )
 
+    # Forecasts move on the ~1 km model grid and refresh hourly
+    cache_key = f"weather:{round(lat, 3)},{round(lon, 3)}:{date.today().isoformat()}:{days}"
+
     try:
-        req = urllib.request.Request(url, headers={"User-Agent": "SmartCommute/1.0"})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            data = json.loads(resp.read().decode())
+        data = _get_json(url, timeout=10, ttl=WEATHER_TTL_S, key=cache_key)
 
         daily = data.get("daily", {})
         forecasts = []
-
-        for i in range(len(daily.get("time", []))):
-            date_str = daily["time"][i]
-            wmo_code = daily["weather_code"][i]
-            dt = datetime.strptime(date_str, "%Y-%m-%d")
-
+        if not daily.get("time"):
+            return forecasts
+
+        lut_idx = _wmo_lookup_index(daily["weather_code"])
+        descs = _WMO_DESC_LUT[lut_idx].tolist()
+        categories = _WMO_CAT_LUT[lut_idx].tolist()
+
+        # Days since 1970-01-01 (a Thursday) → weekday with 0=Mon, 6=Sun
+        dows = (np.array(daily["time"], dtype="datetime64[D]").astype(np.int64) + 3) % 7
+        day_names = _DAY_NAMES[dows].tolist()
+
+        for date_str, day_name, dow, wmo_code, desc, category, precip, t_max, t_min in zip(
+            daily["time"], day_names, dows.tolist(), daily["weather_code"], descs,
+            categories, daily["precipitation_probability_max"],
+            daily["temperature_2m_max"], daily["temperature_2m_min"],
+        ):
             forecasts.append({
                 "date": date_str,
-                "day_name": dt.strftime("%A"),
-                "day_of_week_num": dt.weekday(),  # 0=Mon, 6=Sun
+                "day_name": day_name,
+                "day_of_week_num": dow,  # 0=Mon, 6=Sun
                 "weather_code": wmo_code,
-                "weather_desc": WMO_DESCRIPTIONS.get(wmo_code, f"Code {wmo_code}"),
-                "weather_category": WMO_TO_CATEGORY.get(wmo_code, "Clear"),
-                "precip_probability": daily["precipitation_probability_max"][i],
-                "temp_max_f": daily["temperature_2m_max"][i],
-                "temp_min_f": daily["temperature_2m_min"][i],
+                "weather_desc": desc,
+                "weather_category": category,
+                "precip_probability": precip,
+                "temp_max_f": t_max,
+                "temp_min_f": t_min,
             })
 
         return forecasts
@@ -235,6 +527,29 @@ def get_tomorrow_forecast(lat, lon):
     return None
 
 
+# ══════════════════════════════════════════════════════════════
+# BATCHING
+# ══════════════════════════════════════════════════════════════
+
+def run_all(calls, max_workers=8):
+    """
+    Run independent service calls concurrently and return their results
+    in the same order, so a batch takes about as long as its slowest call.
+
+    `calls` is an iterable of (function, *args) tuples, e.g.
+        run_all([(get_driving_info, "Atlanta, GA", "Gainesville, GA"),
+                 (get_weather_forecast, 34.2979, -83.8241)])
+    All requests share the pooled session, so warm connections are reused;
+    Nominatim lookups inside a batch still run one at a time.
+    """
+    calls = list(calls)
+    if not calls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as ex:
+        futures = [ex.submit(fn, *args) for fn, *args in calls]
+        return [f.result() for f in futures]
+
+
 # ══════════════════════════════════════════════════════════════
 # CLI TEST
 # ══════════════════════════════════════════════════════════════
@@ -244,27 +559,27 @@ if __name__ == "__main__":
     print("🚗  SmartCommute — Live Data Services Test")
     print("=" * 60)
 
+    # Routing (both test routes from one OSRM table request) and the
+    # forecast are independent, so fetch them as one concurrent batch
+    pairs = [("Atlanta, GA", "Gainesville, GA"), ("New York, NY", "Boston, MA")]
+    matrix, forecasts = run_all([
+        (get_driving_matrix, [o for o, _ in pairs], [d for _, d in pairs]),
+        (get_weather_forecast, 34.2979, -83.8241, 3),
+    ])
+
     # Test routing
-    print("\n📍 Routing: Atlanta, GA → Gainesville, GA")
-    route = get_driving_info("Atlanta, GA", "Gainesville, GA")
-    if route["success"]:
-        print(f"   Distance : {route['distance_mi']} mi")
-        print(f"   Base time: {route['duration_min']} min (no traffic)")
-    else:
-        print(f"   ❌ {route['error']}")
+    for i, (origin, dest) in enumerate(pairs):
+        print(f"\n📍 Routing: {origin} → {dest}")
+        if matrix["success"]:
+            print(f"   Distance : {matrix['distance_mi'][i, i]} mi")
+            print(f"   Base time: {matrix['duration_min'][i, i]} min (no traffic)")
+        else:
+            print(f"   ❌ {matrix['error']}")
 
     # Test weather
     print("\n🌦️  Weather Forecast (Gainesville, GA):")
-    forecasts = get_weather_forecast(34.2979, -83.8241, days=3)
     for f in forecasts:
         print(f"   {f['day_name']:10s} {f['date']}  "
               f"{f['weather_desc']:25s}  "
               f"Precip: {f['precip_probability']:3d}%  "
               f"→ Category: {f['weather_category']}")
-
-    # Test different route
-    print("\n📍 Routing: New York, NY → Boston, MA")
-    route2 = get_driving_info("New York, NY", "Boston, MA")
-    if route2["success"]:
-        print(f"   Distance : {route2['distance_mi']} mi")
-        print(f"   Base time: {route2['duration_min']} min (no traffic)")